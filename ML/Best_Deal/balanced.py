@@ -5,20 +5,85 @@ Created on Thu Mar 27 13:26:29 2025
 @author: USER
 """
 
-import pandas as pd
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+
 import numpy as np
 
-# تحميل البيانات المصنفة
-df = pd.read_csv('classified_products.csv')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dataset_io import iter_dataset, write_dataset
+
+
+# 📌 المرور الأول: عدّ الفئات دفعة بدفعة (قراءة عمود deal فقط)
+def count_classes(path, chunk_size):
+    class_counts = Counter()
+    for chunk in iter_dataset(path, columns=['deal'], chunk_size=chunk_size):
+        class_counts.update(chunk['deal'].value_counts().to_dict())
+    return class_counts
+
+
+# 📌 المرور الثاني: أخذ min_count صف من كل فئة بدون إعادة وبشكل منتظم، دفعة بدفعة.
+# عدد الصفوف المأخوذة من كل دفعة يُسحب من التوزيع فوق الهندسي (hypergeometric) حسب ما تبقى من الفئة،
+# ثم تُختار الصفوف عشوائيًا داخل الدفعة. نفس البذرة ونفس حجم الدفعة تعطي نفس النتيجة.
+def sample_chunks(path, class_counts, min_count, chunk_size, seed):
+    rng = np.random.default_rng(seed)
+    remaining = dict(class_counts)  # صفوف الفئة التي لم نمر عليها بعد
+    needed = {deal: min_count for deal in class_counts}  # صفوف الفئة التي ما زلنا نحتاجها
+
+    for chunk in iter_dataset(path, chunk_size=chunk_size):
+        deals = chunk['deal'].to_numpy()
+        keep = np.zeros(len(chunk), dtype=bool)
+        for deal in sorted(class_counts):
+            rows = np.flatnonzero(deals == deal)
+            if len(rows) == 0:
+                continue
+            take = rng.hypergeometric(len(rows), remaining[deal] - len(rows), needed[deal]) if needed[deal] else 0
+            keep[rng.choice(rows, take, replace=False)] = True
+            remaining[deal] -= len(rows)
+            needed[deal] -= take
+        if keep.any():
+            yield chunk[keep]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='موازنة الفئات بدون تحميل البيانات كاملة في الذاكرة')
+    parser.add_argument('--input', default='classified_products.parquet')
+    parser.add_argument('--output', default='balanced_classified_products.parquet')
+    parser.add_argument('--chunk-size', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    # التحقق من توزيع الفئات
+    class_counts = count_classes(args.input, args.chunk_size)
+    if not class_counts:
+        sys.exit(f"❌ لا توجد بيانات في {args.input}")
+    min_count = min(class_counts.values())  # أخذ أقل عدد من العينات المتاحة في أي فئة
+
+    # موازنة الفئات عبر أخذ عينات متساوية وحفظها دفعة بدفعة
+    output_counts = Counter()
 
-# التحقق من توزيع الفئات
-class_counts = df['deal'].value_counts()
-min_count = class_counts.min()  # أخذ أقل عدد من العينات المتاحة في أي فئة
+    def counted(chunks):
+        for chunk in chunks:
+            output_counts.update(chunk['deal'].value_counts().to_dict())
+            yield chunk
 
-# موازنة الفئات عبر أخذ عينات متساوية
-balanced_df = df.groupby('deal').apply(lambda x: x.sample(min_count, random_state=42)).reset_index(drop=True)
+    rows = write_dataset(counted(sample_chunks(args.input, class_counts, min_count, args.chunk_size, args.seed)), args.output)
 
-# حفظ البيانات المتوازنة
-balanced_df.to_csv('balanced_classified_products.csv', index=False, encoding='utf-8-sig')
+    # حفظ ملف manifest بعدد الصفوف لكل فئة قبل وبعد الموازنة
+    manifest_path = os.path.splitext(args.output)[0] + '.manifest.json'
+    with open(manifest_path, 'w', encoding='utf-8') as handle:
+        json.dump({
+            'input': args.input,
+            'output': args.output,
+            'seed': args.seed,
+            'chunk_size': args.chunk_size,
+            'rows': rows,
+            'per_class': min_count,
+            'input_counts': {deal: int(count) for deal, count in sorted(class_counts.items())},
+            'output_counts': {deal: int(count) for deal, count in sorted(output_counts.items())},
+        }, handle, ensure_ascii=False, indent=2)
 
-print("✅ تم إنشاء ملف balanced_classified_products.csv مع توزيع متساوٍ للفئات!")
+    print(f"✅ تم إنشاء ملف {args.output} مع توزيع متساوٍ للفئات ({min_count:,} لكل فئة)، والـ manifest في {manifest_path}!")
@@ -1,59 +1,107 @@
-import pandas as pd
+import argparse
 import numpy as np
-from sklearn.model_selection import train_test_split, StratifiedKFold
+import pandas as pd
 from sklearn.preprocessing import LabelEncoder
-from xgboost import XGBClassifier
+import xgboost as xgb
 from sklearn.metrics import classification_report
 import joblib
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
-# 📌 قراءة البيانات
-df = pd.read_csv('balanced_classified_products.csv')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dataset_io import iter_dataset
+from xgb_training import available_threads, select_device, track_run, training_matrix
 
-# 📌 ترميز الأعمدة النصية
-le_product = LabelEncoder()
-le_deal = LabelEncoder()
-df['product_encoded'] = le_product.fit_transform(df['product'])
-df['deal_encoded'] = le_deal.fit_transform(df['deal'])  # Excellent = 0, Good = 1, Fair = 2, Bad = 3
+parser = argparse.ArgumentParser(description='تدريب نموذج تصنيف الصفقات')
+parser.add_argument('--data', default='balanced_classified_products.parquet')
+parser.add_argument('--device', default=None, help='auto أو cpu أو cuda (الافتراضي XGB_DEVICE أو auto)')
+parser.add_argument('--threads', type=int, default=None, help='عدد خيوط المعالج (الافتراضي TRAIN_THREADS أو كل الأنوية المتاحة)')
+parser.add_argument('--external-memory', action='store_true', help='حفظ صفحات البيانات على القرص بدل الذاكرة')
+parser.add_argument('--chunk-size', type=int, default=500_000)
+parser.add_argument('--test-size', type=float, default=0.2)
+parser.add_argument('--seed', type=int, default=42)
+args = parser.parse_args()
 
-# ✅ إنشاء ميزة جديدة لتحسين التوقعات
-df['price_per_distance'] = df['price'] / (df['distance'] + 1)  # تجنب القسمة على صفر
+# 📌 اختيار الجهاز تلقائيًا: GPU إن وُجد، وإلا hist على المعالج بعدد خيوط محدد
+device = select_device(args.device)
+threads = args.threads or available_threads()
+print(f"🔥 التدريب على {device} بعدد {threads} خيوط")
 
-# 📌 تحديد الميزات والهدف
 features = ['product_encoded', 'price', 'distance', 'avg_price', 'price_deviation', 'price_per_distance']
-X = df[features]
-y = df['deal_encoded']
-
-# 📌 تقسيم البيانات إلى تدريب واختبار
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-
-# 🔥 إعداد XGBoost مع GPU
-xgb = XGBClassifier(
-    objective='multi:softmax',
-    num_class=4,  # عدد الفئات
-    tree_method='gpu_hist',  # استخدام GPU
-    predictor='gpu_predictor',
-    eval_metric='mlogloss',
-    n_estimators=300,  # عدد الأشجار
-    max_depth=10,  # عمق الأشجار
-    learning_rate=0.1,
-    subsample=0.8,
-    colsample_bytree=0.8,
-    random_state=42
-)
-
-# ✅ تدريب النموذج
-xgb.fit(X_train, y_train)
-
-# 📌 التقييم على بيانات الاختبار
-y_pred_xgb = xgb.predict(X_test)
+columns = ['product', 'price', 'distance', 'avg_price', 'price_deviation', 'deal']
+
+# 📌 المرور الأول: أسماء المنتجات والفئات فقط لتجهيز الـ encoders
+products, deals = set(), set()
+for chunk in iter_dataset(args.data, columns=['product', 'deal'], chunk_size=args.chunk_size):
+    products.update(map(str, chunk['product'].unique()))
+    deals.update(map(str, chunk['deal'].unique()))
+
+# 📌 ترميز الأعمدة النصية
+le_product = LabelEncoder().fit(sorted(products))
+le_deal = LabelEncoder().fit(sorted(deals))  # Excellent = 0, Good = 1, Fair = 2, Bad = 3
+
+
+# 📌 قراءة البيانات دفعة بدفعة وتقسيمها إلى تدريب واختبار؛ كل دفعة لها بذرة ثابتة فيبقى التقسيم نفسه في كل مرور
+def prepared_chunks(test):
+    for i, chunk in enumerate(iter_dataset(args.data, columns=columns, chunk_size=args.chunk_size)):
+        is_test = np.random.default_rng([args.seed, i]).random(len(chunk)) < args.test_size
+        chunk = chunk[is_test == test]
+
+        X = pd.DataFrame({
+            'product_encoded': le_product.transform(chunk['product'].astype(str)),
+            'price': chunk['price'].to_numpy(),
+            'distance': chunk['distance'].to_numpy(),
+            'avg_price': chunk['avg_price'].to_numpy(),
+            'price_deviation': chunk['price_deviation'].to_numpy(),
+            # ✅ إنشاء ميزة جديدة لتحسين التوقعات
+            'price_per_distance': (chunk['price'] / (chunk['distance'] + 1)).to_numpy(),  # تجنب القسمة على صفر
+        }, columns=features)
+        yield X, le_deal.transform(chunk['deal'].astype(str))
+
+
+# 🔥 إعداد XGBoost (نفس إعدادات XGBClassifier السابقة)
+params = {
+    'objective': 'multi:softmax',
+    'num_class': len(le_deal.classes_),  # عدد الفئات
+    'eval_metric': 'mlogloss',
+    'tree_method': 'hist',
+    'device': device,
+    'nthread': threads,
+    'max_depth': 10,  # عمق الأشجار
+    'learning_rate': 0.1,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+    'seed': 42,
+}
+
+# ✅ تدريب النموذج: QuantileDMatrix تُبنى دفعة بدفعة، فلا تُحمّل البيانات الخام كاملة في الذاكرة
+with track_run('تدريب XGBoost', device=device, threads=threads, external_memory=args.external_memory):
+    dtrain = training_matrix(lambda: prepared_chunks(test=False), external_memory=args.external_memory)
+    booster = xgb.train(params, dtrain, num_boost_round=300)  # عدد الأشجار
+
+# 📌 التقييم على بيانات الاختبار دفعة بدفعة
+y_test, y_pred_xgb = [], []
+for X, y in prepared_chunks(test=True):
+    y_test.append(y)
+    y_pred_xgb.append(booster.inplace_predict(X).astype(int))
 print("\n🔥 تقرير XGBoost:")
-print(classification_report(y_test, y_pred_xgb))
+print(classification_report(np.concatenate(y_test), np.concatenate(y_pred_xgb)))
 
 # ✅ حفظ النموذج والـ encoders
-xgb.save_model('best_xgb_model.json')
+booster.save_model('best_xgb_model.json')
 
 joblib.dump(le_product, 'product_encoder.pkl')
 joblib.dump(le_deal, 'deal_encoder.pkl')
 print("✅ تم حفظ النموذج والـ Encoders بنجاح!")
+
+# ✅ تصدير أسماء المنتجات والفئات إلى JSON للخادم الخفيف slim_main.py (بدون sklearn/joblib)
+from slim_export import DEAL_LABELS, export_deal
+export_deal('.')
+
+# ✅ نشر نسخة جديدة في سجل النماذج (اختياري) ليحمّلها الخادم دون إعادة تشغيل
+if os.environ.get('MODEL_REGISTRY_DIR'):
+    from model_registry import publish_version
+    version_dir = publish_version(os.environ['MODEL_REGISTRY_DIR'], 'deal', ['best_xgb_model.json', 'product_encoder.pkl', 'deal_encoder.pkl', DEAL_LABELS])
+    print(f"✅ تم نشر النسخة الجديدة في {version_dir}")
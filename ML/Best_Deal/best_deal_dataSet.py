@@ -1,5 +1,13 @@
-import pandas as pd
+import argparse
+import os
+import sys
+import time
+
 import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dataset_io import write_dataset
 
 # القاموس الذي يحتوي على الأجهزة ونطاق أسعارها
 product_price_ranges =  {
@@ -89,44 +97,66 @@ product_price_ranges =  {
     "Redmi Note 10": (120, 170)
 }
 
-# عدد العينات# عدد العينات
-num_samples = 5_000_000  
-np.random.seed(42)
-
-# توليد البيانات العشوائية
-products = np.random.choice(list(product_price_ranges.keys()), num_samples)
-prices = np.array([
-    round(np.random.uniform(low=product_price_ranges[product][0], high=product_price_ranges[product][1]), 2)
-    for product in products
-])
-
-# توزيع المسافات بشكل أكثر واقعية
-distances = np.round(np.random.exponential(scale=15, size=num_samples), 2)
-distances = np.clip(distances, 0, 70)
-
-# إنشاء DataFrame
-df = pd.DataFrame({'product': products, 'price': prices, 'distance': distances})
-
-# حساب متوسط السعر لكل منتج بطريقة أكثر كفاءة
-avg_price_dict = {product: np.mean([low, high]) for product, (low, high) in product_price_ranges.items()}
-df['avg_price'] = df['product'].map(avg_price_dict)
-
-# حساب الانحراف السعري
-df['price_deviation'] = (df['price'] - df['avg_price']) / df['avg_price']
-
-# تحسين التصنيف باستخدام numpy
-df['deal'] = np.where(
-    (df['price_deviation'] < -0.2) & (df['distance'] <= 25), 'Excellent',
-    np.where(
-        (df['price_deviation'] < -0.1) | ((df['price_deviation'] < 0) & (df['distance'] <= 50)), 'Good',
-        np.where(
-            (df['price_deviation'] < 0.1), 'Fair',
-            'Bad'
-        )
+# 📌 حدود الأسعار ومتوسطها لكل منتج كمصفوفات، حتى يتم توليد الأسعار دفعة واحدة حسب رقم المنتج
+product_names = np.array(list(product_price_ranges.keys()))
+price_bounds = np.array(list(product_price_ranges.values()), dtype=float)
+low_prices, high_prices = price_bounds[:, 0], price_bounds[:, 1]
+avg_prices = price_bounds.mean(axis=1)
+
+
+# تحسين التصنيف باستخدام numpy (الشروط تُفحص بالترتيب)
+def classify_deals(price_deviation, distances):
+    return np.select(
+        [
+            (price_deviation < -0.2) & (distances <= 25),
+            (price_deviation < -0.1) | ((price_deviation < 0) & (distances <= 50)),
+            price_deviation < 0.1,
+        ],
+        ['Excellent', 'Good', 'Fair'],
+        default='Bad',
     )
-)
 
-# حفظ البيانات النهائية مع التصنيف
-df.to_csv('classified_products.csv', index=False, encoding='utf-8-sig')
 
-print("✅ تم إنشاء ملف classified_products.csv مع التصنيف بنجاح!")
\ No newline at end of file
+# توليد دفعة واحدة من البيانات بعمليات numpy فقط (بدون حلقة على الصفوف)
+def generate_chunk(rng, size):
+    product_idx = rng.integers(0, len(product_names), size)
+    prices = np.round(rng.uniform(low_prices[product_idx], high_prices[product_idx]), 2)
+
+    # توزيع المسافات بشكل أكثر واقعية
+    distances = np.clip(np.round(rng.exponential(scale=15, size=size), 2), 0, 70)
+
+    # حساب متوسط السعر والانحراف السعري
+    avg_price = avg_prices[product_idx]
+    price_deviation = (prices - avg_price) / avg_price
+
+    return pd.DataFrame({
+        'product': pd.Categorical.from_codes(product_idx, categories=product_names),
+        'price': prices,
+        'distance': distances,
+        'avg_price': avg_price,
+        'price_deviation': price_deviation,
+        'deal': classify_deals(price_deviation, distances),
+    })
+
+
+def generate_chunks(num_samples, chunk_size, seed):
+    # مولد واحد يستمر عبر الدفعات: نفس البذرة ونفس حجم الدفعة تعطي نفس البيانات
+    rng = np.random.default_rng(seed)
+    for start in range(0, num_samples, chunk_size):
+        yield generate_chunk(rng, min(chunk_size, num_samples - start))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='توليد بيانات الصفقات المصنفة على دفعات')
+    parser.add_argument('--rows', type=int, default=5_000_000, help='عدد العينات')
+    parser.add_argument('--chunk-size', type=int, default=500_000, help='عدد الصفوف في كل دفعة')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='classified_products.parquet', help='ملف .parquet أو .feather أو .csv')
+    args = parser.parse_args()
+    if args.rows < 1 or args.chunk_size < 1:
+        parser.error('--rows and --chunk-size must be positive')
+
+    started = time.perf_counter()
+    # حفظ الدفعات واحدة تلو الأخرى حتى تبقى الذاكرة ثابتة مهما كان عدد الصفوف
+    write_dataset(generate_chunks(args.rows, args.chunk_size, args.seed), args.output)
+    print(f"✅ تم إنشاء ملف {args.output} ({args.rows:,} صف) مع التصنيف بنجاح في {time.perf_counter() - started:.1f} ثانية!")
@@ -1,14 +1,22 @@
+import os
+import sys
 import joblib
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import classification_report
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from product_index import ProductIndex
+
 # ✅ تحميل النموذج والمشفرات
 xgb_model = joblib.load('best_xgb_model.pkl')
 le_product = joblib.load('product_encoder.pkl')
 le_deal = joblib.load('deal_encoder.pkl')
 
+# ✅ فهرس المنتجات (اسم -> ترميز) بدل البحث في le_product.classes_
+product_index = ProductIndex.from_encoder(le_product)
+
 # ✅ تعريف بيانات الاختبار
 sample_data = [
     {'product': 'iPhone 13', 'price': 150, 'distance': 5},   
@@ -46,11 +54,12 @@ def predict_bulk(data_list):
         distance = data['distance']
         
         # التعامل مع المنتجات غير المعروفة
-        if product_name not in le_product.classes_:
+        entry = product_index.get(product_name)
+        if entry is None:
             predictions.append({'product': product_name, 'price': price, 'distance': distance, 'prediction': 'Unknown Product'})
             continue
         
-        product_encoded = le_product.transform([product_name])[0]
+        product_encoded = entry[0]
         avg_price = avg_price_dict.get(product_name, price)  # استخدم متوسط الحساب الجديد
 
         # حساب price_deviation و price_per_distance
@@ -69,7 +78,7 @@ def predict_bulk(data_list):
 
         # ✅ التنبؤ
         prediction_encoded = xgb_model.predict(input_data)[0]
-        predicted_deal = le_deal.inverse_transform([prediction_encoded])[0]
+        predicted_deal = le_deal.classes_[prediction_encoded]
         
         # تحسين التصنيف: إضافة رسالة حول ما إذا كان السعر مميزًا بناءً على الفئة
         if predicted_deal == 'Good' and price_deviation < -0.1:
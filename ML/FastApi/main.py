@@ -1,32 +1,65 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+import os
+import sys
 import joblib
-import pandas as pd
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.preprocessing.sequence import pad_sequences
-import pickle
+from types import SimpleNamespace
+from typing import List
 from sklearn.preprocessing import LabelEncoder, MinMaxScaler
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from micro_batcher import MicroBatcher
+from model_registry import ModelLoadError, ModelRegistry
+from product_index import ProductIndex
+from registry_routes import admin_router
+from sentiment_inference import load_sentiment_model, load_vectorizer, padding_buckets, predict_sentiment_batch
+
 # 🌟 Initialize FastAPI app
 app = FastAPI()
 
-# 🔹 Load models
-print("Loading models...")
+# 🔹 Load models in parallel in the background; models not in PRELOAD_MODELS load on first use.
+#    With MODEL_REGISTRY_DIR set, artifacts come from <dir>/<model>/<version>/ and can be hot reloaded.
+registry = ModelRegistry(root=os.environ.get("MODEL_REGISTRY_DIR"))
+PRELOAD_MODELS = os.environ.get("PRELOAD_MODELS", "price,deal,sentiment").split(",")
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# 🔹 SENTIMENT_BACKEND=tflite serves the quantized sentiment_lstm.tflite with TFLITE_THREADS threads per worker
+SENTIMENT_BACKEND = os.environ.get("SENTIMENT_BACKEND", "keras")
+TFLITE_THREADS = int(os.environ.get("TFLITE_THREADS", "1"))
+
+
+def load_price_model(path):
+    # Price Prediction Model (XGBoost) and its column layout, resolved once per model version
+    model_price = joblib.load(os.path.join(path, "price_prediction_model_xgb.pkl"))
+    columns = list(model_price.feature_names_in_)
+    price = SimpleNamespace(
+        model=model_price,
+        n_columns=len(columns),
+        launched_price_offset=columns.index("Launched Price (OMR)"),
+        brand_offsets={col[len("Brand_"):]: i for i, col in enumerate(columns) if col.startswith("Brand_")},
+    )
+    model_price.predict(np.zeros((1, price.n_columns), dtype=np.float32))  # Warm up
+    return price
+
+
+def load_deal_model(path):
+    # Deal Classification Model (Keras)
+    from compiled_model import CompiledModel  # imports TensorFlow
+    return CompiledModel.load(os.path.join(path, "best_deal_improved.keras"))
 
-# Price Prediction Model (XGBoost)
-model_price = joblib.load("price_prediction_model_xgb.pkl")
-train_columns = model_price.feature_names_in_
 
-# Deal Classification Model (Keras)
-model_deal = tf.keras.models.load_model("best_deal_improved.keras")
+def load_sentiment(path):
+    # Sentiment Analysis Model (LSTM), its vocabulary and the padding buckets for batch requests
+    model = load_sentiment_model(path, SENTIMENT_BACKEND, TFLITE_THREADS)
 
-# Sentiment Analysis Model (LSTM)
-model_sentiment = tf.keras.models.load_model("sentiment_lstm.h5")
+    return SimpleNamespace(model=model, vectorizer=load_vectorizer(path), buckets=padding_buckets(model))
 
-# Load Tokenizer for Sentiment Analysis
-with open("tokenizer.pkl", "rb") as handle:
-    tokenizer = pickle.load(handle)
+
+registry.register("price", load_price_model, eager="price" in PRELOAD_MODELS)
+registry.register("deal", load_deal_model, eager="deal" in PRELOAD_MODELS)
+registry.register("sentiment", load_sentiment, eager="sentiment" in PRELOAD_MODELS)
 
 # 🔹 Product price ranges used in training
 product_price_ranges = {
@@ -120,9 +153,17 @@ product_price_ranges = {
 label_encoder = LabelEncoder()
 label_encoder.fit(list(product_price_ranges.keys()))
 
-# 🔹 MinMaxScaler for distance normalization
+# 🔹 Product index: name -> (encoded value, average price) without encoder calls per request
+product_index = ProductIndex.from_encoder(label_encoder, price_ranges=product_price_ranges)
+
+# 🔹 MinMaxScaler for distance normalization, applied as distance * scale + offset instead of a transform() call
 scaler_distance = MinMaxScaler()
 scaler_distance.fit(np.array([[0], [70]]))
+DISTANCE_SCALE, DISTANCE_OFFSET = scaler_distance.scale_[0], scaler_distance.min_[0]
+
+# 🔹 Deal model output index -> deal category
+DEAL_LABELS = np.array(["Excellent Deal", "Good Deal", "Bad Deal"], dtype=object)
+DEAL_PREDICT_BATCH_SIZE = int(os.environ.get("DEAL_PREDICT_BATCH_SIZE", "1024"))
 
 # 🔹 Price normalization parameters
 MIN_PRICE, MAX_PRICE = 50, 2500  # Adjust based on dataset range
@@ -134,12 +175,20 @@ class PricePredictionRequest(BaseModel):
     launched_price: float
 
 
+class PriceBatchRequest(BaseModel):
+    items: List[PricePredictionRequest]
+
+
 class DealPredictionRequest(BaseModel):
     product_name: str
     price: float
     distance: float
 
 
+class DealBatchRequest(BaseModel):
+    items: List[DealPredictionRequest]
+
+
 class SentimentAnalysisRequest(BaseModel):
     text: str
 
@@ -148,85 +197,168 @@ class SentimentResponse(BaseModel):
     sentiment: str
     confidence: float
 
- 
-#📌 Function to predict price over time
-def predict_price(brand: str, launched_price: float):
-    # إنشاء DataFrame جديد بالإدخال
-    product_data = {'Launched Price (OMR)': [launched_price]}
 
-    # إضافة الأعمدة الخاصة بالعلامات التجارية بناءً على One Hot Encoding
-    for col in train_columns:
-        if "Brand_" in col:
-            product_data[col] = [1 if col == f"Brand_{brand}" else 0]
+class SentimentBatchRequest(BaseModel):
+    texts: List[str]
+
 
-    # تحويل البيانات إلى DataFrame
-    new_data = pd.DataFrame(product_data)
+class SentimentBatchResponse(BaseModel):
+    results: List[SentimentResponse]
 
-    # التأكد من تطابق ترتيب الأعمدة
-    new_data = new_data[train_columns]
+ 
+#📌 Function to predict prices over time for many (brand, launched price) pairs in one model call
+def predict_prices(brands, launched_prices):
+    price = registry.get("price")
+
+    # Feature matrix: launched price plus the brand's one-hot column (unknown brands stay all zeros)
+    X = np.zeros((len(brands), price.n_columns), dtype=np.float32)
+    X[:, price.launched_price_offset] = launched_prices
+    offsets = np.array([price.brand_offsets.get(brand, -1) for brand in brands], dtype=np.intp)
+    rows = np.flatnonzero(offsets >= 0)
+    X[rows, offsets[rows]] = 1
 
     # توقع الأسعار المستقبلية
-    predicted_prices = model_price.predict(new_data)
+    return price.model.predict(X).reshape(len(brands), -1)
+
 
+def format_price_forecast(predicted_prices):
     return {
-        "Price After 3 Months": f"{predicted_prices[0][0]:.2f} OMR",
-        "Price After 6 Months": f"{predicted_prices[0][1]:.2f} OMR",
-        "Price After 9 Months": f"{predicted_prices[0][2]:.2f} OMR",
-        "Price After 12 Months": f"{predicted_prices[0][3]:.2f} OMR"
+        "Price After 3 Months": f"{predicted_prices[0]:.2f} OMR",
+        "Price After 6 Months": f"{predicted_prices[1]:.2f} OMR",
+        "Price After 9 Months": f"{predicted_prices[2]:.2f} OMR",
+        "Price After 12 Months": f"{predicted_prices[3]:.2f} OMR"
     }
 
 
-# 📌 Function to classify deal quality
-def predict_deal(product_name: str, price: float, distance: float):
-    if product_name not in product_price_ranges:
-        raise HTTPException(status_code=400, detail="Product not found in training data.")
+#📌 Function to predict price over time
+def predict_price(brand: str, launched_price: float):
+    return format_price_forecast(predict_prices([brand], [launched_price])[0])
+
 
-    avg_price = np.mean(product_price_ranges[product_name])
-    price_deviation = (price - avg_price) / avg_price
-    product_encoded = label_encoder.transform([product_name])[0]
-    distance_norm = scaler_distance.transform([[distance]])[0][0]
+# 📌 Function to classify deal quality for many products in one model call
+def predict_deals(product_names, prices, distances):
+    codes, avg_prices = product_index.lookup(product_names)
+    known = codes >= 0
+    labels = np.full(len(codes), None, dtype=object)  # None for products not in the training data
+    if not known.any():
+        return labels
 
-    # Prepare input
-    X_test = np.array([[product_encoded, price_deviation, distance_norm]])
+    price = np.asarray(prices, dtype=float)[known]
+    price_deviation = (price - avg_prices[known]) / avg_prices[known]
+    distance_norm = np.asarray(distances, dtype=float)[known] * DISTANCE_SCALE + DISTANCE_OFFSET
 
     # Get prediction
-    prediction = model_deal.predict([X_test[:, 0], X_test[:, 1:]])
-    label = np.argmax(prediction)
+    prediction = registry.get("deal").predict(
+        [codes[known].astype(float), np.column_stack([price_deviation, distance_norm])],
+        batch_size=DEAL_PREDICT_BATCH_SIZE,
+    )
 
     # Map prediction to deal categories
-    deal_map = {0: "Excellent Deal", 1: "Good Deal", 2: "Bad Deal"}
-    return {"deal": deal_map[label]}
+    labels[known] = DEAL_LABELS[np.argmax(prediction, axis=1)]
+    return labels
 
 
-# 📌 Function for sentiment analysis
-def predict_sentiment(text: str, model, tokenizer, max_len=50):
-    sequence = tokenizer.texts_to_sequences([text])
-    padded_sequence = pad_sequences(sequence, maxlen=max_len)
+# 📌 Function to classify deal quality
+def predict_deal(product_name: str, price: float, distance: float):
+    label = predict_deals([product_name], [price], [distance])[0]
+    if label is None:
+        raise HTTPException(status_code=400, detail="Product not found in training data.")
+    return {"deal": label}
 
-    prediction = model.predict(padded_sequence)[0][0]
-    sentiment = "Positive" if prediction > 0.5 else "Negative"
-    confidence = prediction if prediction > 0.5 else 1 - prediction
 
-    return sentiment, confidence
+def score_sentiment(texts):
+    sentiment = registry.get("sentiment")
+    return predict_sentiment_batch(texts, sentiment.model, sentiment.vectorizer, buckets=sentiment.buckets)
+
+
+# 🔹 Concurrent sentiment requests are grouped into one LSTM call
+sentiment_batcher = MicroBatcher(
+    score_sentiment,
+    max_batch_size=int(os.environ.get("SENTIMENT_MAX_BATCH_SIZE", "32")),
+    max_wait_ms=float(os.environ.get("SENTIMENT_MAX_WAIT_MS", "5")),
+)
 
 
 # 📌 API Endpoints
 
+@app.exception_handler(ModelLoadError)
+async def model_load_error_handler(request, exc):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
+# /healthz, /readyz and /admin/models/{name}/reload (disabled unless ADMIN_TOKEN is set)
+app.include_router(admin_router(registry, admin_token=ADMIN_TOKEN))
+
+
 @app.post("/predict_price/")
 def get_predicted_price(request: PricePredictionRequest):
     return predict_price(request.brand, request.launched_price)
 
 
+@app.post("/predict_price_batch/")
+def get_predicted_price_batch(request: PriceBatchRequest):
+    if not request.items:
+        return {"predictions": []}
+    predicted_prices = predict_prices(
+        [item.brand for item in request.items],
+        np.array([item.launched_price for item in request.items], dtype=np.float32),
+    )
+    return {"predictions": [
+        {
+            "brand": item.brand,
+            "launched_price": item.launched_price,
+            **format_price_forecast(prices),
+            "3_months": float(prices[0]),
+            "6_months": float(prices[1]),
+            "9_months": float(prices[2]),
+            "12_months": float(prices[3]),
+        }
+        for item, prices in zip(request.items, predicted_prices)
+    ]}
+
+
 @app.post("/predict_deal/")
 def get_predicted_deal(request: DealPredictionRequest):
     return predict_deal(request.product_name, request.price, request.distance)
 
 
+@app.post("/predict_deal_batch/")
+def get_predicted_deal_batch(request: DealBatchRequest):
+    labels = predict_deals(
+        [item.product_name for item in request.items],
+        [item.price for item in request.items],
+        [item.distance for item in request.items],
+    )
+    return {"predictions": [
+        {"product_name": item.product_name, "deal": label} if label is not None
+        else {"product_name": item.product_name, "error": "Product not found in training data."}
+        for item, label in zip(request.items, labels)
+    ]}
+
+
 @app.post("/predict_sentiment/", response_model=SentimentResponse)
-def get_predicted_sentiment(request: SentimentAnalysisRequest):
-    sentiment, confidence = predict_sentiment(request.text, model_sentiment, tokenizer)
+async def get_predicted_sentiment(request: SentimentAnalysisRequest):
+    sentiment, confidence = await sentiment_batcher.submit(request.text)
     return SentimentResponse(sentiment=sentiment, confidence=confidence)
 
 
+@app.post("/predict_sentiment_batch/", response_model=SentimentBatchResponse)
+def get_predicted_sentiment_batch(request: SentimentBatchRequest):
+    results = score_sentiment(request.texts)
+    return SentimentBatchResponse(results=[
+        SentimentResponse(sentiment=sentiment, confidence=confidence) for sentiment, confidence in results
+    ])
+
+
+@app.get("/predict_sentiment/metrics")
+def get_sentiment_batcher_metrics():
+    return sentiment_batcher.metrics()
+
+
+# 🔹 Start loading models in the background, and pick up newly published versions if MODEL_WATCH_INTERVAL is set
+registry.load_all()
+registry.watch(float(os.environ.get("MODEL_WATCH_INTERVAL", "0")))
+
+
 # ✅ Run the FastAPI server using:
 #     uvicorn fastapi_app:app --reload
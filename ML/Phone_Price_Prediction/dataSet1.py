@@ -1,9 +1,14 @@
-import pandas as pd
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-import random
+import pandas as pd
 
-# تحديد عدد الأجهزة
-num_devices = 500000  # يمكنك تغيير الرقم حسب الحاجة
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dataset_io import write_dataset
 
 # بيانات الماركات والموديلات (عينات)
 brands = ["Apple", "Samsung", "Google", "OnePlus", "Xiaomi", "Oppo", "Huawei"]
@@ -22,54 +27,124 @@ brand_cpus = {
 
 screen_types = ["LCD", "OLED", "AMOLED"]
 
-# إنشاء بيانات عشوائية ولكن واقعية
-data = []
-for _ in range(num_devices):
-    brand = random.choice(brands)
-    model = f"{brand} {random.choice(models)} {random.randint(1, 20)}"
-    release_year = random.randint(2018, 2024)
-    release_date = f"{release_year}"
-    cpu = random.choice(brand_cpus[brand])
-    ram = random.choice([4, 6, 8, 12, 16]) if brand != "Apple" else random.choice([4, 6])
-    storage = random.choice([64, 128, 256, 512]) if brand != "Apple" else random.choice([128, 256, 512])
-    screen_size = round(np.random.normal(6.5, 0.5), 2)  # متوسط 6.5 إنش
-    screen_type = random.choice(screen_types)
-    camera = random.choice([12, 48, 50, 64, 108])  # ميغابكسل
-    battery = random.choice([3000, 4000, 4500, 5000, 6000]) if brand != "Apple" else random.choice([2815, 3227, 3687])
-    
+columns = ["Brand", "Model", "Release Date", "CPU", "RAM (GB)", "Storage (GB)", "Screen Size (inches)", "Screen Type", "Camera (MP)", "Battery (mAh)", "Launch Price (USD)", "Current Price (USD)", "Price After 3 Months (USD)", "Price After 6 Months (USD)", "Price After 9 Months (USD)", "Price After 12 Months (USD)"]
+
+# 📌 جداول الاختيار كمصفوفات: الصف حسب الماركة (أو Apple/غيرها)، والعمود يُختار عشوائيًا ضمن عدد الخيارات المتاحة
+brand_names = np.array(brands)
+cpu_names = sorted({cpu for cpus in brand_cpus.values() for cpu in cpus})
+cpu_counts = np.array([len(brand_cpus[brand]) for brand in brands])
+cpu_table = np.array([[cpu_names.index(cpu) for cpu in brand_cpus[brand]] + [0] * (3 - len(brand_cpus[brand])) for brand in brands])
+
+# [غير Apple, Apple]
+ram_options = (np.array([4, 6, 8, 12, 16]), np.array([4, 6]))
+storage_options = (np.array([64, 128, 256, 512]), np.array([128, 256, 512]))
+battery_options = (np.array([3000, 4000, 4500, 5000, 6000]), np.array([2815, 3227, 3687]))
+camera_options = np.array([12, 48, 50, 64, 108])  # ميغابكسل
+
+# كل أسماء الموديلات الممكنة: "<الماركة> <النوع> <1-20>"
+model_names = np.array([f"{brand} {model} {number}" for brand in brands for model in models for number in range(1, 21)])
+premium_models = np.isin(models, ["Pro", "Ultra"])
+
+# الفئات مرتبة أبجديًا مثل أعمدة النصوص، حتى يبقى get_dummies(drop_first=True) في model.py كما هو
+categories = {
+    "Brand": sorted(brands),
+    "Model": sorted(model_names),
+    "CPU": cpu_names,
+    "Screen Type": sorted(screen_types),
+}
+
+
+def choose(rng, options_by_row, is_apple):
+    # اختيار قيمة لكل صف من خيارات Apple أو غيرها
+    other, apple = options_by_row
+    values = other[rng.integers(0, len(other), len(is_apple))]
+    values[is_apple] = apple[rng.integers(0, len(apple), is_apple.sum())]
+    return values
+
+
+# 📌 توليد دفعة من الأجهزة بعمليات numpy فقط؛ كل دفعة لها بذرة خاصة بها (seed, رقم الدفعة)
+def generate_chunk(seed, chunk_index, size):
+    rng = np.random.default_rng([seed, chunk_index])
+
+    brand = rng.integers(0, len(brands), size)
+    model = rng.integers(0, len(models), size)
+    model_number = rng.integers(1, 21, size)
+    release_year = rng.integers(2018, 2025, size)
+    cpu = cpu_table[brand, (rng.random(size) * cpu_counts[brand]).astype(int)]
+    is_apple = brand == brands.index("Apple")
+    ram = choose(rng, ram_options, is_apple)
+    storage = choose(rng, storage_options, is_apple)
+    screen_size = np.round(rng.normal(6.5, 0.5, size), 2)  # متوسط 6.5 إنش
+    screen_type = rng.integers(0, len(screen_types), size)
+    camera = camera_options[rng.integers(0, len(camera_options), size)]
+    battery = choose(rng, battery_options, is_apple)
+
     # حساب سعر الإطلاق بناءً على المواصفات والبراند
-    base_price = 250 if brand in ["Apple", "Samsung"] else 150
+    is_premium_brand = np.isin(brand, [brands.index("Apple"), brands.index("Samsung")])
+    base_price = np.where(is_premium_brand, 250, 150).astype(float)
     base_price += ram * 15
     base_price += (storage / 64) * 40
     base_price += (screen_size - 5) * 25
     base_price += camera * 1.5
     base_price += (battery / 1000) * 30
-    if screen_type == "AMOLED":
-        base_price += 80
-    if "Pro" in model or "Ultra" in model:
-        base_price += 100
-    launch_price = round(base_price, 2)
-    
+    base_price += np.where(screen_type == screen_types.index("AMOLED"), 80, 0)
+    base_price += np.where(premium_models[model], 100, 0)
+    launch_price = np.round(base_price, 2)
+
     # حساب السعر الحالي بناءً على العمر مع تأثير التراجع الطبيعي
     years_old = 2025 - release_year
-    depreciation_rate = 0.15 if brand in ["Apple", "Samsung"] else 0.20
-    depreciation = min(launch_price * depreciation_rate * years_old, launch_price * 0.80)  # انخفاض السعر سنويًا
-    current_price = round(max(launch_price - depreciation, 50), 2)
-    
+    depreciation_rate = np.where(is_premium_brand, 0.15, 0.20)
+    depreciation = np.minimum(launch_price * depreciation_rate * years_old, launch_price * 0.80)  # انخفاض السعر سنويًا
+    current_price = np.round(np.maximum(launch_price - depreciation, 50), 2)
+
+    df = pd.DataFrame({
+        "Brand": pd.Categorical(brand_names[brand], categories=categories["Brand"]),
+        "Model": pd.Categorical(model_names[(brand * len(models) + model) * 20 + model_number - 1], categories=categories["Model"]),
+        "Release Date": release_year.astype(str),
+        "CPU": pd.Categorical.from_codes(cpu, categories=categories["CPU"]),
+        "RAM (GB)": ram,
+        "Storage (GB)": storage,
+        "Screen Size (inches)": screen_size,
+        "Screen Type": pd.Categorical(np.array(screen_types)[screen_type], categories=categories["Screen Type"]),
+        "Camera (MP)": camera,
+        "Battery (mAh)": battery,
+        "Launch Price (USD)": launch_price,
+        "Current Price (USD)": current_price,
+    })
+
     # توقع الأسعار بعد 3، 6، 9، و 12 شهرًا
     monthly_depreciation_rate = depreciation_rate / 12
-    price_after_3_months = round(max(current_price * (1 - monthly_depreciation_rate * 3), 50), 2)
-    price_after_6_months = round(max(current_price * (1 - monthly_depreciation_rate * 6), 50), 2)
-    price_after_9_months = round(max(current_price * (1 - monthly_depreciation_rate * 9), 50), 2)
-    price_after_12_months = round(max(current_price * (1 - monthly_depreciation_rate * 12), 50), 2)
-    
-    data.append([brand, model, release_date, cpu, ram, storage, screen_size, screen_type, camera, battery, launch_price, current_price, price_after_3_months, price_after_6_months, price_after_9_months, price_after_12_months])
-
-# إنشاء DataFrame
-columns = ["Brand", "Model", "Release Date", "CPU", "RAM (GB)", "Storage (GB)", "Screen Size (inches)", "Screen Type", "Camera (MP)", "Battery (mAh)", "Launch Price (USD)", "Current Price (USD)", "Price After 3 Months (USD)", "Price After 6 Months (USD)", "Price After 9 Months (USD)", "Price After 12 Months (USD)"]
-df = pd.DataFrame(data, columns=columns)
+    for months in (3, 6, 9, 12):
+        df[f"Price After {months} Months (USD)"] = np.round(np.maximum(current_price * (1 - monthly_depreciation_rate * months), 50), 2)
+
+    return df[columns]
+
+
+def generate_chunks(num_devices, chunk_size, seed, workers=1):
+    # نفس البذرة ونفس حجم الدفعة تعطي نفس البيانات مهما كان عدد العمليات
+    sizes = [min(chunk_size, num_devices - start) for start in range(0, num_devices, chunk_size)]
+    args = ([seed] * len(sizes), range(len(sizes)), sizes)
+    if workers <= 1:
+        yield from map(generate_chunk, *args)
+        return
+
+    # تقسيم الدفعات على عدة عمليات؛ النتائج تعود بالترتيب
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(generate_chunk, *args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="توليد بيانات أسعار الأجهزة")
+    parser.add_argument("--rows", type=int, default=500000, help="عدد الأجهزة")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="عدد الصفوف في كل دفعة (وكل بذرة فرعية)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1, help="عدد العمليات المتوازية")
+    parser.add_argument("--output", default="device_prices_realistic.parquet", help="ملف .parquet أو .feather أو .csv")
+    args = parser.parse_args()
+    if args.rows < 1 or args.chunk_size < 1:
+        parser.error("--rows and --chunk-size must be positive")
 
-# حفظ البيانات في ملف CSV
-file_path = "device_prices_realistic.csv"
-df.to_csv(file_path, index=False)
-print(f"Dataset saved as {file_path}")
+    started = time.perf_counter()
+    # حفظ الدفعات واحدة تلو الأخرى
+    write_dataset(generate_chunks(args.rows, args.chunk_size, args.seed, args.workers), args.output)
+    print(f"Dataset saved as {args.output} ({args.rows:,} rows in {time.perf_counter() - started:.1f}s)")
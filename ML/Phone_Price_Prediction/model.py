@@ -3,10 +3,36 @@ import numpy as np
 from sklearn.model_selection import train_test_split, RandomizedSearchCV
 from sklearn.metrics import mean_squared_error
 from xgboost import XGBRegressor
+import argparse
 import joblib
+import json
+import os
+import sys
+import time
 
-# قراءة الداتا
-df = pd.read_csv("device_prices_realistic.csv")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from dataset_io import read_dataset
+from hyperparam_search import sample_candidates, successive_halving
+from xgb_training import available_threads, select_device, track_run
+
+parser = argparse.ArgumentParser(description="تدريب نموذج توقع أسعار الأجهزة")
+parser.add_argument("--data", default="device_prices_realistic.parquet")
+parser.add_argument("--search", choices=["halving", "random"], default="halving",
+                    help="halving: البحث المتدرج مع الإيقاف المبكر، random: RandomizedSearchCV السابق")
+parser.add_argument("--compare", action="store_true", help="تشغيل الطريقتين وطباعة تقرير التوقيت (search_report.json)")
+parser.add_argument("--candidates", type=int, default=27, help="عدد الإعدادات في الجولة الأولى")
+parser.add_argument("--min-rounds", type=int, default=30)
+parser.add_argument("--max-rounds", type=int, default=300)
+parser.add_argument("--eta", type=int, default=3, help="يبقى أفضل 1/eta من الإعدادات في كل جولة")
+parser.add_argument("--early-stopping", type=int, default=20)
+parser.add_argument("--threads-per-model", type=int, help="افتراضيًا: توزيع الأنوية بالتساوي على الإعدادات المتوازية")
+parser.add_argument("--checkpoint", default="device_price_search.jsonl",
+                    help="نتائج البحث لاستئنافه؛ نتائج بيانات مختلفة تُتجاهل تلقائيًا")
+args = parser.parse_args()
+if args.eta < 2:
+    parser.error("--eta must be at least 2, otherwise the rounds never grow between rungs")
+if args.min_rounds < 1 or args.max_rounds < args.min_rounds:
+    parser.error("--min-rounds must be positive and at most --max-rounds")
 
 # تجهيز الأعمدة المستهدفة (Target)
 price_targets = [
@@ -16,12 +42,18 @@ price_targets = [
     "Price After 12 Months (USD)"
 ]
 
+# قراءة الداتا: الأعمدة المستخدمة فقط (بدون "Model" و"Release Date" و"Launch Price (USD)")، بنفس ترتيبها في الملف
+feature_columns = [
+    "Brand", "CPU", "RAM (GB)", "Storage (GB)", "Screen Size (inches)", "Screen Type",
+    "Camera (MP)", "Battery (mAh)", "Current Price (USD)"
+]
+df = read_dataset(args.data, columns=feature_columns + price_targets)
+
 # تحويل النصوص إلى أرقام باستخدام One Hot Encoding
 df = pd.get_dummies(df, columns=["Brand", "CPU", "Screen Type"], drop_first=True)
 
 # تحديد الـ Features (كل شيء ما عدا الأعمدة المستهدفة)
-# حذف "Launch Price (USD)" من الأعمدة المدخلة
-X = df.drop(columns=price_targets + ['Model', 'Release Date', 'Launch Price (USD)'])  # حذف العمود "Launch Price (USD)"
+X = df.drop(columns=price_targets)
 y = df[price_targets]
 
 # تقسيم البيانات
@@ -29,15 +61,9 @@ X_train, X_test, y_train, y_test = train_test_split(
     X, y, test_size=0.2, random_state=42
 )
 
-# بناء نموذج XGBoost
-model = XGBRegressor(
-    random_state=42,
-    tree_method='gpu_hist',  # استخدام GPU
-    gpu_id=0,  # تأكد من أن رقم الـ GPU صحيح إذا كان لديك أكثر من واحد
-)
-
-
-# ضبط المعاملات باستخدام RandomizedSearchCV
+# GPU إذا كان متاحًا وإلا CPU (XGB_DEVICE=cpu|cuda للتحديد يدويًا)، وعدد الخيوط صريح (TRAIN_THREADS، افتراضيًا كل الأنوية المتاحة)
+device = select_device()
+threads = available_threads()
 param_dist = {
     "n_estimators": [100, 200, 300],
     "max_depth": [3, 4, 5],
@@ -45,15 +71,66 @@ param_dist = {
     "subsample": [0.8, 0.9, 1.0],
 }
 
-random_search = RandomizedSearchCV(
-    model, param_distributions=param_dist, n_iter=10, cv=3, random_state=42, n_jobs=-1
-)
 
-# تدريب النموذج
-random_search.fit(X_train, y_train)
+# 📌 البحث السابق: RandomizedSearchCV بـ 10 إعدادات و cv=3، كل إعداد يتدرب حتى n_estimators كاملة
+def random_search():
+    model = XGBRegressor(random_state=42, tree_method='hist', device=device, n_jobs=threads)
+    # n_jobs=1: الخيوط كلها لـ XGBoost، حتى لا تتنافس التجارب المتوازية على نفس الأنوية
+    search = RandomizedSearchCV(
+        model, param_distributions=param_dist, n_iter=10, cv=3, random_state=42, n_jobs=1
+    )
+    search.fit(X_train, y_train)
+    return search.best_estimator_, {"params": search.best_params_, "boosting_rounds": int(sum(
+        params["n_estimators"] for params in search.cv_results_["params"]) * 3 + search.best_params_["n_estimators"])}
+
 
-# التنبؤ على بيانات الاختبار
-y_pred = random_search.best_estimator_.predict(X_test)
+# 📌 البحث المتدرج (successive halving): عدد الأشجار هو الميزانية بدل أن يكون معاملًا،
+# وكل تدريب يتوقف مبكرًا على جزء تحقق (validation) من بيانات التدريب
+def halving_search():
+    X_fit, X_valid, y_fit, y_valid = train_test_split(X_train, y_train, test_size=0.2, random_state=42)
+    candidates = sample_candidates({key: values for key, values in param_dist.items() if key != "n_estimators"},
+                                   args.candidates, seed=42)
+    base_params = {"objective": "reg:squarederror", "eval_metric": "rmse", "tree_method": "hist", "device": device, "seed": 42}
+
+    result = successive_halving(
+        X_fit, y_fit, X_valid, y_valid, candidates, base_params, threads,
+        min_rounds=args.min_rounds, max_rounds=args.max_rounds, eta=args.eta,
+        early_stopping_rounds=args.early_stopping,
+        # على GPU يتدرب إعداد واحد في كل مرة
+        threads_per_model=threads if device == "cuda" else args.threads_per_model,
+        checkpoint=args.checkpoint,
+    )
+
+    # إعادة تدريب أفضل إعداد على كل بيانات التدريب بعدد الأشجار الذي توقف عنده
+    best = result["best"]
+    n_estimators = best["best_iteration"] + 1
+    model = XGBRegressor(random_state=42, tree_method='hist', device=device, n_jobs=threads,
+                         n_estimators=n_estimators, **best["params"])
+    model.fit(X_train, y_train)
+    return model, {"params": dict(best["params"], n_estimators=n_estimators), "rungs": result["rungs"],
+                   "boosting_rounds": sum(min(run["rounds"], run["best_iteration"] + 1 + args.early_stopping)
+                                          for run in result["runs"] if not run.get("resumed")) + n_estimators}
+
+
+searches = {"halving": halving_search, "random": random_search}
+report = {}
+for name in (["random", "halving"] if args.compare else [args.search]):
+    started = time.perf_counter()
+    with track_run(f"تدريب XGBoost ({name})", device=device, threads=threads, rows=len(X_train)):
+        model, details = searches[name]()
+    y_pred = model.predict(X_test)
+    report[name] = dict(details, seconds=round(time.perf_counter() - started, 1),
+                        test_mse=float(mean_squared_error(y_test, y_pred)))
+    print(f"✅ {name}: {report[name]['params']}")
+
+# تقرير المقارنة: الوقت، عدد جولات التعزيز التي تم تدريبها تقريبًا، والـ MSE على بيانات الاختبار
+if args.compare:
+    print(f"{'search':<10}{'seconds':>10}{'rounds trained':>16}{'test MSE':>12}")
+    for name, row in report.items():
+        print(f"{name:<10}{row['seconds']:>10.1f}{row['boosting_rounds']:>16,}{row['test_mse']:>12.2f}")
+    print(f"speedup: {report['random']['seconds'] / report['halving']['seconds']:.1f}x")
+    with open("search_report.json", "w", encoding="utf-8") as handle:
+        json.dump({"device": device, "threads": threads, "rows": len(X_train), "searches": report}, handle, indent=2)
 
 # حساب الـ MSE لكل فترة زمنية
 mse = mean_squared_error(y_test, y_pred, multioutput='raw_values')
@@ -61,5 +138,16 @@ for i, period in enumerate(price_targets):
     print(f"Mean Squared Error for {period}: {mse[i]:.2f}")
 
 # حفظ النموذج النهائي
-joblib.dump(random_search.best_estimator_, "device_price_prediction_model_xgb.pkl")
+joblib.dump(model, "device_price_prediction_model_xgb.pkl")
 print("✅ تم حفظ النموذج بنجاح!")
+
+# تصدير الـ Booster بصيغة JSON للخادم الخفيف slim_main.py (بدون sklearn/joblib)
+from slim_export import DEVICE_PRICE_BOOSTER, export_device_price
+export_device_price(".")
+
+# نشر نسخة جديدة في سجل النماذج (اختياري) ليحمّلها الخادم دون إعادة تشغيل
+if os.environ.get("MODEL_REGISTRY_DIR"):
+    from model_registry import publish_version
+    version_dir = publish_version(os.environ["MODEL_REGISTRY_DIR"], "device_price", ["device_price_prediction_model_xgb.pkl", DEVICE_PRICE_BOOSTER])
+    print(f"✅ تم نشر النسخة الجديدة في {version_dir}")
+
@@ -1,23 +1,15 @@
 
+import os
+import sys
 import joblib
-import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from device_features import DeviceFeatureEncoder
 
 # تحميل النموذج
 model = joblib.load("device_price_prediction_model_xgb.pkl")
 print("✅ تم تحميل النموذج بنجاح!")
 
-# الأعمدة المتوقعة في البيانات المدخلة بعد One-Hot Encoding
-expected_columns = [
-    'RAM (GB)', 'Storage (GB)', 'Screen Size (inches)', 'Camera (MP)', 'Battery (mAh)', 
-    'Current Price (USD)', 
-    'Brand_Google', 'Brand_Huawei', 'Brand_OnePlus', 'Brand_Oppo', 'Brand_Samsung', 'Brand_Xiaomi', 
-    'CPU_A15 Bionic', 'CPU_A16 Bionic', 'CPU_Dimensity 8000', 'CPU_Dimensity 8100', 'CPU_Exynos 2100', 
-    'CPU_Exynos 990', 'CPU_Google Tensor', 'CPU_Google Tensor G2', 'CPU_Kirin 9000', 'CPU_Kirin 990', 
-    'CPU_Snapdragon 732G', 'CPU_Snapdragon 778G', 'CPU_Snapdragon 8 Gen 1', 'CPU_Snapdragon 8 Gen 2', 
-    'CPU_Snapdragon 8+ Gen 1', 'CPU_Snapdragon 865', 'CPU_Snapdragon 870', 'CPU_Snapdragon 888', 
-    'Screen Type_LCD', 'Screen Type_OLED'
-]
-
 # نموذج الإدخال اليدوي (مثال):
 manual_input = {
     "RAM (GB)": 6,
@@ -31,22 +23,12 @@ manual_input = {
     "Screen Type": "LCD"  # تأكد من نوع الشاشة
 }
 
-# تحويل الإدخال إلى DataFrame
-input_df = pd.DataFrame([manual_input])
-
-# تحويل النصوص إلى أرقام باستخدام One Hot Encoding (مثلًا 'Brand', 'CPU', 'Screen Type')
-input_df = pd.get_dummies(input_df)
-
-# التأكد من أن الأعمدة المتوقعة موجودة في البيانات المدخلة
-for col in expected_columns:
-    if col not in input_df.columns:
-        input_df[col] = 0  # إضافة العمود بالقيمة صفر إذا لم يكن موجودًا
-
-# ترتيب الأعمدة بالترتيب المتوقع
-input_df = input_df[expected_columns]
+# ترميز One-Hot مباشرة في مصفوفة NumPy بنفس ترتيب أعمدة التدريب (يرفض الفئات غير المعروفة)
+encoder = DeviceFeatureEncoder.from_model(model)
+input_matrix = encoder.encode([manual_input])
 
 # التنبؤ باستخدام النموذج
-prediction = model.predict(input_df)
+prediction = model.predict(input_matrix)
 
 # عرض التنبؤ بالأسعار المستقبلية
 print("✅ التنبؤ بالأسعار المستقبلية:")
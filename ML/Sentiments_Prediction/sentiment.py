@@ -1,3 +1,6 @@
+import os
+import sys
+import pickle
 import pandas as pd
 import numpy as np
 import tensorflow as tf
@@ -7,6 +10,11 @@ from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Embedding, LSTM, Dense, Dropout
 from sklearn.model_selection import train_test_split
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from sentiment_inference import TFLITE_MODEL_FILE, VOCABULARY_FILE
+from text_vectorizer import TextVectorizer, export_vocabulary
+from tflite_model import export_tflite
+
 # Load dataset
 
 columns = ['target', 'id', 'date', 'flag', 'user', 'text']
@@ -45,7 +53,28 @@ model.compile(loss='binary_crossentropy', optimizer='adam', metrics=['accuracy']
 # Train model
 model.fit(X_train, y_train, validation_data=(X_test, y_test), epochs=3, batch_size=64)
 
-# Save model
+# Save model and the tokenizer the API needs to encode texts the same way
 model.save("sentiment_lstm.h5")
 
+with open("tokenizer.pkl", "wb") as handle:
+    pickle.dump(tokenizer, handle)
+
+# Export the vocabulary the API loads instead of the pickle (only the max_words ids texts_to_sequences uses),
+# and check it gives exactly the training sequences
+export_vocabulary(tokenizer, VOCABULARY_FILE)
+if not np.array_equal(TextVectorizer.load(VOCABULARY_FILE).transform(df['text'], max_len)[0], X):
+    raise RuntimeError(f"{VOCABULARY_FILE} does not reproduce the tokenizer's sequences")
+
+# Quantized TensorFlow Lite export for SENTIMENT_BACKEND=tflite: dynamic range (int8 weights) by default,
+# TFLITE_QUANTIZATION=int8 also quantizes the activations, calibrated on training sequences
+quantization = os.environ.get("TFLITE_QUANTIZATION", "dynamic")
+export_tflite(model, TFLITE_MODEL_FILE, quantization, representative_data=X_train[:500])
+
 print("Model training complete and saved as sentiment_lstm.h5")
+print(f"TFLite model ({quantization}) saved as {TFLITE_MODEL_FILE}")
+
+# Publish a new version to the model registry so a running API can hot reload it
+if os.environ.get("MODEL_REGISTRY_DIR"):
+    from model_registry import publish_version
+    version_dir = publish_version(os.environ["MODEL_REGISTRY_DIR"], "sentiment", ["sentiment_lstm.h5", "tokenizer.pkl", VOCABULARY_FILE, TFLITE_MODEL_FILE])
+    print(f"Published new version to {version_dir}")
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Compare per-text sentiment prediction with the bucketed batch path, and the
+Keras tokenizer with the exported vocabulary.
+
+The batch path scores each distinct token sequence once, so the comparison runs
+on distinct texts: sampled from sentiment140.csv when it is in the working
+directory, otherwise random word sequences from the vocabulary. The gain from
+repeated texts is reported separately.
+"""
+
+import os
+import sys
+import time
+import pickle
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from sentiment_inference import MAX_LEN, load_vectorizer, padding_buckets, predict_sentiment, predict_sentiment_batch
+
+# ========== 1. Load the Model and Tokenizer ==========
+model = tf.keras.models.load_model("sentiment_lstm.h5")
+
+with open("tokenizer.pkl", "rb") as handle:
+    tokenizer = pickle.load(handle)
+
+vectorizer = load_vectorizer(".")
+buckets = padding_buckets(model)
+print(f"✅ Model and tokenizer loaded (padding buckets: {buckets})")
+
+# ========== 2. Build the Feedback Backlog ==========
+num_texts = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+if os.path.exists("sentiment140.csv"):
+    df = pd.read_csv("sentiment140.csv", encoding='latin-1', names=['target', 'id', 'date', 'flag', 'user', 'text'])
+    texts = df['text'].drop_duplicates().sample(num_texts, random_state=42).tolist()
+else:
+    rng = np.random.default_rng(42)
+    words = np.array(list(vectorizer.index)[:5000])
+    texts = [" ".join(rng.choice(words, rng.integers(3, 40))) for _ in range(num_texts)]
+
+distinct = len(np.unique(vectorizer.transform(texts, MAX_LEN)[0], axis=0))
+print(f"{num_texts} texts, {distinct} distinct token sequences")
+
+# The same number of texts, repeating a few feedback strings, for the deduplication gain
+feedback = [
+    "I love this product, it's amazing!",
+    "Great value for the price, very satisfied.",
+    "Fast delivery and excellent customer service.",
+    "Terrible service, never buying again.",
+    "The product broke within a week, very disappointed.",
+    "Customer service was rude and unhelpful.",
+    "ok",
+    "Not as described, a complete waste of money. The box was damaged, the charger was missing "
+    "and the seller never answered my messages about a refund.",
+]
+repeated = (feedback * (num_texts // len(feedback) + 1))[:num_texts]
+
+# ========== 3. Time the Preprocessing ==========
+start = time.perf_counter()
+keras_ids = pad_sequences(tokenizer.texts_to_sequences(texts), maxlen=MAX_LEN)
+keras_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+vectorizer_ids = vectorizer.transform(texts, MAX_LEN)[0]
+vectorizer_seconds = time.perf_counter() - start
+
+print(f"Keras tokenizer: {keras_seconds * 1000:.1f}ms, vocabulary: {vectorizer_seconds * 1000:.1f}ms "
+      f"({keras_seconds / vectorizer_seconds:.1f}x), same token ids: {np.array_equal(keras_ids, vectorizer_ids)}")
+
+# ========== 4. Time Both Prediction Paths ==========
+start = time.perf_counter()
+loop_results = [predict_sentiment(text, model, vectorizer) for text in texts]
+loop_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+batch_results = predict_sentiment_batch(texts, model, vectorizer, buckets=buckets)
+batch_seconds = time.perf_counter() - start
+
+max_diff = max(abs(a[1] - b[1]) for a, b in zip(loop_results, batch_results))
+print(f"Per-text loop: {loop_seconds:.2f}s ({num_texts / loop_seconds:.0f} texts/s)")
+print(f"Batch:         {batch_seconds:.2f}s ({num_texts / batch_seconds:.0f} texts/s)")
+print(f"Speedup: {loop_seconds / batch_seconds:.1f}x, max confidence difference: {max_diff:.2e}")
+
+# ========== 5. Time the Batch Path on Repeated Texts ==========
+start = time.perf_counter()
+predict_sentiment_batch(repeated, model, vectorizer, buckets=buckets)
+repeated_seconds = time.perf_counter() - start
+
+print(f"Batch, {len(feedback)} distinct texts repeated: {repeated_seconds:.2f}s "
+      f"({num_texts / repeated_seconds:.0f} texts/s, {batch_seconds / repeated_seconds:.1f}x from deduplication)")
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the Keras sentiment model with its quantized TFLite export: accuracy on
+the sentiment140_Test.py texts and on the held-out split used in training,
+single-text latency (p50/p99) and peak RSS.
+
+Each backend runs in its own process, so RSS includes only what that backend imports.
+Run from the directory with the model files (and sentiment140.csv for the held-out split).
+"""
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from sentiment_inference import MAX_LEN, SENTIMENT_BACKENDS, load_sentiment_model, load_vectorizer, predict_sentiment
+
+parser = argparse.ArgumentParser(description="Keras vs TFLite sentiment model")
+parser.add_argument("--data", default="sentiment140.csv", help="held-out split comes from here (skipped if missing)")
+parser.add_argument("--samples", type=int, default=20000, help="held-out texts to score")
+parser.add_argument("--requests", type=int, default=500, help="single-text calls timed per backend")
+parser.add_argument("--threads", type=int, default=1, help="TFLite interpreter threads")
+parser.add_argument("--measure", choices=SENTIMENT_BACKENDS, help=argparse.SUPPRESS)
+parser.add_argument("--inputs", help=argparse.SUPPRESS)
+args = parser.parse_args()
+
+
+def peak_rss_mb():
+    # VmHWM belongs to this process image; ru_maxrss on Linux keeps the parent's peak across fork + exec
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    import resource
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+# ========== Worker: one backend, one process ==========
+if args.measure:
+    with open(args.inputs, encoding="utf-8") as handle:
+        inputs = json.load(handle)
+
+    start = time.perf_counter()
+    model = load_sentiment_model(".", args.measure, args.threads)
+    vectorizer = load_vectorizer(".")
+    load_seconds = time.perf_counter() - start
+
+    texts = inputs["test_texts"]
+    latencies = []
+    for i in range(args.requests):
+        start = time.perf_counter()
+        predict_sentiment(texts[i % len(texts)], model, vectorizer)
+        latencies.append(time.perf_counter() - start)
+
+    held_out = np.array(inputs["held_out"], dtype=np.int32).reshape(-1, MAX_LEN)
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "test_texts": model.predict(vectorizer.transform(texts, MAX_LEN)[0])[:, 0].tolist(),
+        "held_out": model.predict(held_out, batch_size=256)[:, 0].tolist() if len(held_out) else [],
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+    sys.exit()
+
+# ========== 1. Test Texts and Held-out Split ==========
+# test_texts from sentiment140_Test.py (10 positive, then 10 negative), read without running the script
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "sentiment140_Test.py"), encoding="utf-8") as handle:
+    test_texts = next(
+        ast.literal_eval(node.value) for node in ast.parse(handle.read()).body
+        if isinstance(node, ast.Assign) and getattr(node.targets[0], "id", None) == "test_texts"
+    )
+test_labels = np.array([1] * 10 + [0] * 10)
+
+held_out, held_out_labels = np.zeros((0, MAX_LEN), dtype=np.int32), np.zeros(0, dtype=int)
+if os.path.exists(args.data):
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+
+    # Same split as sentiment.py: train_test_split shuffles row positions, whatever the arrays are
+    df = pd.read_csv(args.data, encoding='latin-1', names=['target', 'id', 'date', 'flag', 'user', 'text'])
+    _, test_idx = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42)
+    test_idx = test_idx[:args.samples]
+    held_out = load_vectorizer(".").transform(df['text'].iloc[test_idx], MAX_LEN)[0]
+    held_out_labels = df['target'].iloc[test_idx].map({0: 0, 4: 1}).to_numpy()
+else:
+    print(f"⚠️ {args.data} not found, skipping the held-out split")
+
+# ========== 2. Run Each Backend in its Own Process ==========
+with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as handle:
+    json.dump({"test_texts": test_texts, "held_out": held_out.ravel().tolist()}, handle)
+    inputs_path = handle.name
+
+results = {}
+try:
+    for backend in SENTIMENT_BACKENDS:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--measure", backend, "--inputs", inputs_path,
+             "--requests", str(args.requests), "--threads", str(args.threads)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results[backend] = json.loads(output.strip().splitlines()[-1])
+finally:
+    os.remove(inputs_path)
+
+# ========== 3. Report ==========
+def accuracy(probabilities, labels):
+    return float(np.mean((np.array(probabilities) > 0.5) == labels)) if len(labels) else float("nan")
+
+print(f"{'backend':<8}{'load s':>8}{'p50 ms':>9}{'p99 ms':>9}{'peak RSS MB':>13}{'test texts':>12}{'held-out':>10}")
+for backend, result in results.items():
+    print(f"{backend:<8}{result['load_seconds']:>8.2f}{result['p50_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+          f"{result['peak_rss_mb']:>13.0f}{accuracy(result['test_texts'], test_labels):>12.2%}"
+          f"{accuracy(result['held_out'], held_out_labels):>10.2%}")
+
+keras, tflite = (np.array(results[b]["test_texts"] + results[b]["held_out"]) for b in SENTIMENT_BACKENDS)
+print(f"Same label: {np.mean((keras > 0.5) == (tflite > 0.5)):.2%}, max probability difference: {np.max(np.abs(keras - tflite)):.4f}")
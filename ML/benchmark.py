@@ -0,0 +1,352 @@
+"""Load test for the inference endpoints of main.py (and slim_main.py).
+
+    python benchmark.py --app main                        # in process, through httpx's ASGI transport
+    python benchmark.py --uvicorn main --workers 2        # starts uvicorn on a free local port
+    python benchmark.py --url http://127.0.0.1:8000 --pid 1234
+
+Each combination of --scenarios, --batch-sizes and --concurrency sends
+--requests requests (after --warmup) from that many concurrent async clients:
+
+- deal: POST /predict_deal with batch-size items
+- sentiment: POST /predict_sentiment/ (batch size 1) or /predict_sentiment_batch/
+- device_price: POST /predict_device_price (batch size 1) or /predict_device_price_batch
+
+Payloads are generated from --seed and differ between requests, so the result
+caches see realistic misses (--repeat-payloads sends one payload per scenario
+to measure cache hits instead). Throughput, p50/p95/p99 latency, errors and the
+server's RSS (the process and its uvicorn workers, sampled during the run) are
+printed and saved as JSON with the git commit; --baseline prints the change
+against an earlier results file.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import httpx
+import numpy as np
+
+from device_features import DeviceFeatureEncoder
+
+PRODUCTS = ["iPhone 13", "Galaxy S23", "iPhone 12 mini", "Galaxy S21", "Pixel 7", "Redmi Note 10", "Galaxy Z Flip5", "iPhone 15 Pro Max"]
+FEEDBACK_WORDS = (
+    "great fast delivery excellent customer service love this product amazing value terrible never buying again "
+    "broke within a week very disappointed slow shipping rude unhelpful waste of money cheap quality recommend"
+).split()
+JSON_HEADERS = {"Content-Type": "application/json"}
+DEVICE_CATEGORIES = {feature: DeviceFeatureEncoder().categories(feature) for feature in ("Brand", "CPU", "Screen Type")}
+
+
+# ====================== Payloads ======================
+def deal_request(rng, batch_size):
+    items = [
+        {"product": rng.choice(PRODUCTS), "price": round(rng.uniform(80, 1200), 2), "distance": round(rng.uniform(0, 60), 1)}
+        for _ in range(batch_size)
+    ]
+    return "/predict_deal", {"items": items}
+
+
+def sentiment_request(rng, batch_size):
+    texts = [" ".join(rng.choices(FEEDBACK_WORDS, k=rng.randint(3, 25))) for _ in range(batch_size)]
+    if batch_size == 1:
+        return "/predict_sentiment/", {"text": texts[0]}
+    return "/predict_sentiment_batch/", {"texts": texts}
+
+
+def device_price_request(rng, batch_size):
+    devices = [{
+        "RAM_GB": rng.choice([4, 6, 8, 12, 16]),
+        "Storage_GB": rng.choice([64, 128, 256, 512]),
+        "Screen_Size_inches": round(rng.gauss(6.5, 0.5), 2),
+        "Camera_MP": rng.choice([12, 48, 50, 64, 108]),
+        "Battery_mAh": rng.choice([3000, 4000, 4500, 5000, 6000]),
+        "Current_Price_USD": round(rng.uniform(100, 1200), 2),
+        "Brand": rng.choice(DEVICE_CATEGORIES["Brand"]),
+        "CPU": rng.choice(DEVICE_CATEGORIES["CPU"]),
+        "Screen_Type": rng.choice(DEVICE_CATEGORIES["Screen Type"]),
+    } for _ in range(batch_size)]
+    if batch_size == 1:
+        return "/predict_device_price", devices[0]
+    return "/predict_device_price_batch", {"devices": devices}
+
+
+SCENARIOS = {"deal": deal_request, "sentiment": sentiment_request, "device_price": device_price_request}
+
+
+def build_requests(scenario, batch_size, count, seed, repeat):
+    rng = random.Random(f"{seed}-{scenario}-{batch_size}")
+    requests = []
+    for _ in range(1 if repeat else count):
+        path, payload = SCENARIOS[scenario](rng, batch_size)
+        requests.append((path, json.dumps(payload).encode("utf-8")))  # serialized once, outside the timed loop
+    return requests * count if repeat else requests
+
+
+# ====================== Server RSS ======================
+def process_tree(pid):
+    pids, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        pids.append(current)
+        try:
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as handle:
+                    stack.extend(int(child) for child in handle.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def rss_mb(pid):
+    """Resident memory of ``pid`` and its child processes (uvicorn workers), or None where /proc isn't available."""
+    if pid is None or not os.path.exists(f"/proc/{pid}/status"):
+        return None
+    total = 0
+    for current in process_tree(pid):
+        try:
+            with open(f"/proc/{current}/status") as handle:
+                total += next(int(line.split()[1]) for line in handle if line.startswith("VmRSS:"))
+        except (OSError, StopIteration):
+            pass
+    return total / 1024
+
+
+async def sample_rss(pid, samples, interval=0.1):
+    while True:
+        samples.append(rss_mb(pid))
+        await asyncio.sleep(interval)
+
+
+# ====================== Running a scenario ======================
+async def send_all(client, requests, concurrency):
+    latencies, statuses = [], Counter()
+    pending = iter(requests)
+
+    async def worker():
+        # Workers share one iterator, so each request is sent exactly once
+        for path, body in pending:
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, content=body, headers=JSON_HEADERS)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def run_scenario(client, pid, scenario, batch_size, concurrency, args):
+    requests = build_requests(scenario, batch_size, args.requests + args.warmup, args.seed, args.repeat_payloads)
+    await send_all(client, requests[:args.warmup], concurrency)
+
+    rss_start = rss_mb(pid)
+    samples = []
+    sampler = asyncio.create_task(sample_rss(pid, samples))
+    try:
+        latencies, statuses, duration = await send_all(client, requests[args.warmup:], concurrency)
+    finally:
+        sampler.cancel()
+    samples = [sample for sample in samples if sample is not None]
+
+    latencies_ms = np.array(latencies) * 1000
+    ok = statuses.get(200, 0)
+    return {
+        "scenario": scenario,
+        "path": requests[0][0],
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(latencies) - ok,
+        "status_codes": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(ok / duration, 2),
+        "items_per_s": round(ok * batch_size / duration, 2),
+        "latency_ms": {
+            "p50": round(float(np.percentile(latencies_ms, 50)), 3),
+            "p95": round(float(np.percentile(latencies_ms, 95)), 3),
+            "p99": round(float(np.percentile(latencies_ms, 99)), 3),
+            "mean": round(float(latencies_ms.mean()), 3),
+            "max": round(float(latencies_ms.max()), 3),
+        },
+        "rss_mb": {
+            "start": rss_start,
+            "peak": max(samples) if samples else None,
+            "end": rss_mb(pid),
+        },
+    }
+
+
+async def wait_ready(client, timeout):
+    # Models load in the background; /readyz turns 200 once every preloaded model is ready
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            response = await client.get("/readyz")
+            if response.status_code == 200:
+                return
+            models = response.json().get("models", {}) if response.headers.get("content-type", "").startswith("application/json") else {}
+            failed = {name: str(model.get("error")).splitlines()[0] for name, model in models.items() if model.get("status") == "failed"}
+            if failed:
+                raise RuntimeError(f"Models failed to load: {failed}")
+        except httpx.HTTPError:
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Server not ready after {timeout:.0f}s")
+        await asyncio.sleep(0.5)
+
+
+async def run(client, pid, args):
+    await wait_ready(client, args.ready_timeout)
+    results = []
+    for scenario in args.scenarios:
+        for batch_size in args.batch_sizes:
+            for concurrency in args.concurrency:
+                result = await run_scenario(client, pid, scenario, batch_size, concurrency, args)
+                results.append(result)
+                print_result(result)
+    return results
+
+
+# ====================== Targets ======================
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(module, workers):
+    port = free_port()
+    server = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", f"{module}:app", "--app-dir", os.path.dirname(os.path.abspath(__file__)),
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+    ])
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def benchmark(args):
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    timeout = httpx.Timeout(args.timeout)
+
+    if args.app:
+        app = importlib.import_module(args.app).app
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=timeout) as client:
+            return await run(client, os.getpid(), args), {"mode": "in-process", "app": args.app}
+
+    server = None
+    if args.uvicorn:
+        server, url = start_uvicorn(args.uvicorn, args.workers)
+        pid, target = server.pid, {"mode": "uvicorn", "app": args.uvicorn, "workers": args.workers}
+    else:
+        url, pid, target = args.url, args.pid, {"mode": "url", "url": args.url}
+
+    try:
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+            return await run(client, pid, args), target
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+# ====================== Reporting ======================
+def print_result(result):
+    latency, rss = result["latency_ms"], result["rss_mb"]
+    print(f"{result['scenario']:<13}batch {result['batch_size']:>4}  conc {result['concurrency']:>4}  "
+          f"{result['throughput_rps']:>9.1f} req/s {result['items_per_s']:>10.1f} items/s  "
+          f"p50 {latency['p50']:>8.2f}  p95 {latency['p95']:>8.2f}  p99 {latency['p99']:>8.2f} ms  "
+          f"errors {result['errors']:>4}  RSS {rss['peak'] if rss['peak'] is not None else float('nan'):>7.1f} MB")
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    previous = {(r["scenario"], r["batch_size"], r["concurrency"]): r for r in baseline["scenarios"]}
+
+    print(f"\nChange against {baseline_path} (commit {baseline.get('commit')}):")
+    for result in results:
+        before = previous.get((result["scenario"], result["batch_size"], result["concurrency"]))
+        if before is None or not before["throughput_rps"] or not before["latency_ms"]["p99"]:
+            continue
+        throughput = result["throughput_rps"] / before["throughput_rps"] - 1
+        p99 = result["latency_ms"]["p99"] / before["latency_ms"]["p99"] - 1
+        print(f"{result['scenario']:<13}batch {result['batch_size']:>4}  conc {result['concurrency']:>4}  "
+              f"throughput {throughput:+7.1%}  p99 {p99:+7.1%}")
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def int_list(value):
+    return [int(part) for part in value.split(",") if part]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the inference endpoints")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--app", help="module to run in process, e.g. main or slim_main")
+    target.add_argument("--uvicorn", help="module to start with uvicorn on a free local port")
+    target.add_argument("--url", help="base URL of a running server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (--uvicorn)")
+    parser.add_argument("--pid", type=int, help="server process to measure RSS for (--url)")
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS))
+    parser.add_argument("--batch-sizes", type=int_list, default=[1, 32])
+    parser.add_argument("--concurrency", type=int_list, default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per run")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed requests before each run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat-payloads", action="store_true", help="send the same payload every time (cache hits)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per request, in seconds")
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    parser.add_argument("--output", help="results file (default: benchmark-<commit>.json)")
+    parser.add_argument("--baseline", help="earlier results file to compare with")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if args.requests < 1 or min(args.batch_sizes + args.concurrency) < 1:
+        parser.error("--requests, --batch-sizes and --concurrency must be positive")
+
+    results, target_info = asyncio.run(benchmark(args))
+
+    commit = git_commit()
+    output = args.output or f"benchmark-{commit or 'unknown'}.json"
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump({
+            "commit": commit,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "target": target_info,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "settings": {key: getattr(args, key) for key in ("requests", "warmup", "seed", "repeat_payloads")},
+            "scenarios": results,
+        }, handle, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Keras models served through a ``tf.function`` with a fixed input signature.
+
+``model.predict`` builds a data adapter, callbacks and a progress bar on every
+call, which dominates the cost of scoring a handful of rows. ``CompiledModel``
+traces the forward pass once (``model(x, training=False)``, the same graph
+``predict`` runs) and calls it directly. ``predict()`` keeps the Keras call
+style so it can replace the model object in existing code.
+"""
+import numpy as np
+import tensorflow as tf
+
+
+class CompiledModel:
+    def __init__(self, model, input_signature=None):
+        self.model = model
+        if input_signature is None:
+            # Model's own input shapes/dtypes with a free batch dimension
+            input_signature = [
+                tf.TensorSpec(shape=[None] + list(tensor.shape[1:]), dtype=tensor.dtype)
+                for tensor in model.inputs
+            ]
+        self.input_signature = list(input_signature)
+        self._forward = tf.function(self._call, input_signature=self.input_signature)
+
+    @classmethod
+    def load(cls, path, input_signature=None, warmup=True):
+        compiled = cls(tf.keras.models.load_model(path), input_signature)
+        if warmup:
+            compiled.warmup()
+        return compiled
+
+    def __getattr__(self, name):
+        # layers, inputs, summary(), ... come from the wrapped Keras model
+        return getattr(self.model, name)
+
+    def _call(self, *inputs):
+        return self.model(list(inputs) if len(inputs) > 1 else inputs[0], training=False)
+
+    def _prepare(self, x):
+        arrays = []
+        for value, spec in zip(x, self.input_signature):
+            value = np.asarray(value, dtype=spec.dtype.as_numpy_dtype)
+            # predict() accepts (n,) for an (n, 1) input; do the same here
+            if spec.shape.rank is not None and value.ndim == spec.shape.rank - 1:
+                value = value[..., np.newaxis]
+            arrays.append(value)
+        return arrays
+
+    def predict(self, x, batch_size=None, verbose=None):
+        inputs = self._prepare(x if isinstance(x, (list, tuple)) else [x])
+        num_rows = len(inputs[0])
+        if not batch_size or num_rows <= batch_size:
+            return self._forward(*inputs).numpy()
+
+        return np.concatenate([
+            self._forward(*[value[start:start + batch_size] for value in inputs]).numpy()
+            for start in range(0, num_rows, batch_size)
+        ])
+
+    def warmup(self):
+        # Trace the graph now instead of on the first request
+        dummy = [
+            np.zeros([1] + [dim or 1 for dim in spec.shape[1:]], dtype=spec.dtype.as_numpy_dtype)
+            for spec in self.input_signature
+        ]
+        self._forward(*dummy)
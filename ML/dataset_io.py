@@ -0,0 +1,102 @@
+"""Dataset files shared by the training pipeline scripts.
+
+The format follows the file extension:
+
+- ``.parquet``: compressed columnar file, one row group per written chunk.
+- ``.feather`` / ``.arrow``: uncompressed Arrow IPC file. Reads are memory
+  mapped, so loading a projection of a large file costs almost no RAM.
+- ``.csv``: kept for interoperability.
+
+Categorical columns (e.g. ``product``) are stored dictionary-encoded and come
+back as pandas categoricals. Pass ``columns`` to read only what a stage needs.
+pyarrow is only imported for the columnar formats.
+"""
+import os
+
+import pandas as pd
+
+COLUMNAR_FORMATS = {".parquet": "parquet", ".feather": "feather", ".arrow": "feather"}
+
+
+def dataset_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in COLUMNAR_FORMATS:
+        return COLUMNAR_FORMATS[ext]
+    raise ValueError(f"Unsupported dataset file '{path}', expected .parquet, .feather, .arrow or .csv")
+
+
+def write_dataset(chunks, path):
+    """Write a DataFrame, or an iterable of DataFrame chunks with the same columns, one chunk at a time."""
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+    fmt = dataset_format(path)
+    rows = 0
+
+    if fmt == "csv":
+        with open(path, "w", encoding="utf-8", newline="") as handle:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(handle, index=False, header=(i == 0))
+                rows += len(chunk)
+        return rows
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = schema = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                if fmt == "parquet":
+                    writer = pq.ParquetWriter(path, schema)
+                else:
+                    writer = pa.ipc.new_file(path, schema)
+            writer.write_table(table.cast(schema))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def _read_table(path, fmt, columns, memory_map):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if fmt == "parquet":
+        return pq.read_table(path, columns=columns, memory_map=memory_map)
+    source = pa.memory_map(path) if memory_map else pa.OSFile(path)
+    table = pa.ipc.open_file(source).read_all()
+    return table.select(columns) if columns is not None else table
+
+
+def read_dataset(path, columns=None, memory_map=True):
+    """Read a whole dataset (or just ``columns``) into a DataFrame."""
+    fmt = dataset_format(path)
+    if fmt == "csv":
+        return pd.read_csv(path, usecols=columns)[columns] if columns is not None else pd.read_csv(path)
+    return _read_table(path, fmt, columns, memory_map).to_pandas()
+
+
+def iter_dataset(path, columns=None, chunk_size=1_000_000, memory_map=True):
+    """Yield the dataset as DataFrames of at most ``chunk_size`` rows, in file order."""
+    fmt = dataset_format(path)
+    if fmt == "csv":
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=chunk_size):
+            yield chunk[columns] if columns is not None else chunk
+        return
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        batches = pq.ParquetFile(path, memory_map=memory_map).iter_batches(batch_size=chunk_size, columns=columns)
+    else:
+        # Arrow IPC is memory mapped: slicing it into batches doesn't copy the data
+        batches = _read_table(path, fmt, columns, memory_map).to_batches(max_chunksize=chunk_size)
+
+    for batch in batches:
+        yield batch.to_pandas()
+
@@ -0,0 +1,38 @@
+"""Deal model features shared by the API apps and the offline scorer.
+
+The deal model takes six features per listing, in ``DEAL_FEATURES`` order.
+``avg_price`` is the mean price of the same product over the listings scored
+together: one request in the API, the whole input file in ``score.py``. The
+predicted class is then adjusted by how far the price is from that average.
+"""
+import numpy as np
+
+DEAL_FEATURES = ['product_encoded', 'price', 'distance', 'avg_price', 'price_deviation', 'price_per_distance']
+
+
+def average_prices(codes, price):
+    # Mean price of each row's product over these rows
+    _, group = np.unique(codes, return_inverse=True)
+    group = group.reshape(-1)
+    return (np.bincount(group, weights=price) / np.bincount(group))[group]
+
+
+def deal_features(codes, price, distance, avg_price=None):
+    """float32 matrix in DEAL_FEATURES order and the price deviation, for known products (codes >= 0)."""
+    price = np.asarray(price, dtype=float)
+    distance = np.asarray(distance, dtype=float)
+    if avg_price is None:
+        avg_price = average_prices(codes, price)
+    price_deviation = (price - avg_price) / avg_price
+
+    matrix = np.column_stack([
+        codes, price, distance, avg_price, price_deviation, price / (distance + 1)
+    ]).astype(np.float32)
+    return matrix, price_deviation
+
+
+def adjust_deals(predicted_deal, price_deviation):
+    # Same rules as the original deal endpoint, applied in place to an object array of labels
+    predicted_deal[(predicted_deal == 'Good') & (price_deviation < -0.1)] = 'Excellent'
+    predicted_deal[(predicted_deal == 'Fair') & (price_deviation > 0.1)] = 'Bad'
+    return predicted_deal
@@ -0,0 +1,101 @@
+"""Precompiled one-hot encoding for the device price model.
+
+Replaces ``pd.get_dummies`` + column padding on every request: the column
+layout is resolved once into offsets, and each device is written straight into
+a preallocated float32 row. Unknown categories raise ``UnknownCategoryError``
+instead of silently encoding as all zeros.
+"""
+import numpy as np
+
+# Column layout the device price model was trained with (ML/Phone_Price_Prediction/model.py)
+EXPECTED_COLUMNS = [
+    'RAM (GB)', 'Storage (GB)', 'Screen Size (inches)', 'Camera (MP)', 'Battery (mAh)',
+    'Current Price (USD)',
+    'Brand_Google', 'Brand_Huawei', 'Brand_OnePlus', 'Brand_Oppo', 'Brand_Samsung', 'Brand_Xiaomi',
+    'CPU_A15 Bionic', 'CPU_A16 Bionic', 'CPU_Dimensity 8000', 'CPU_Dimensity 8100', 'CPU_Exynos 2100',
+    'CPU_Exynos 990', 'CPU_Google Tensor', 'CPU_Google Tensor G2', 'CPU_Kirin 9000', 'CPU_Kirin 990',
+    'CPU_Snapdragon 732G', 'CPU_Snapdragon 778G', 'CPU_Snapdragon 8 Gen 1', 'CPU_Snapdragon 8 Gen 2',
+    'CPU_Snapdragon 8+ Gen 1', 'CPU_Snapdragon 865', 'CPU_Snapdragon 870', 'CPU_Snapdragon 888',
+    'Screen Type_LCD', 'Screen Type_OLED'
+]
+
+CATEGORICAL_FEATURES = ['Brand', 'CPU', 'Screen Type']
+
+# model.py encodes with drop_first=True, so the first category of each feature has no column
+# and is a valid all-zeros encoding
+DROPPED_CATEGORIES = {'Brand': 'Apple', 'CPU': 'A14 Bionic', 'Screen Type': 'AMOLED'}
+
+
+class UnknownCategoryError(ValueError):
+    def __init__(self, feature, value):
+        super().__init__(f"Unknown {feature} '{value}'")
+        self.feature = feature
+        self.value = value
+
+
+class DeviceFeatureEncoder:
+    def __init__(self, columns=EXPECTED_COLUMNS, dropped_categories=DROPPED_CATEGORIES):
+        self.columns = list(columns)
+        self.dropped_categories = dict(dropped_categories)
+        self.numeric_offsets = {}
+        self.category_offsets = {feature: {} for feature in CATEGORICAL_FEATURES}
+
+        for offset, column in enumerate(self.columns):
+            for feature in CATEGORICAL_FEATURES:
+                if column.startswith(f"{feature}_"):
+                    self.category_offsets[feature][column[len(feature) + 1:]] = offset
+                    break
+            else:
+                self.numeric_offsets[column] = offset
+
+        self._numeric_columns = list(self.numeric_offsets)
+        self._numeric_index = np.array(list(self.numeric_offsets.values()), dtype=np.intp)
+
+    @classmethod
+    def from_model(cls, model):
+        # Trust the model's own column order when it was fitted on a DataFrame (sklearn API or raw Booster)
+        columns = getattr(model, "feature_names_in_", None)
+        if columns is None:
+            columns = getattr(model, "feature_names", None)
+        return cls(EXPECTED_COLUMNS if columns is None else list(columns))
+
+    def categories(self, feature):
+        return [self.dropped_categories[feature]] + list(self.category_offsets[feature])
+
+    def encode_into(self, record, row):
+        """Write one device (keyed by the training column names) into a zeroed row."""
+        row[self._numeric_index] = [record[column] for column in self._numeric_columns]
+        for feature, offsets in self.category_offsets.items():
+            value = record[feature]
+            offset = offsets.get(value)
+            if offset is not None:
+                row[offset] = 1
+            elif value != self.dropped_categories.get(feature):
+                raise UnknownCategoryError(feature, value)
+
+    def encode(self, records):
+        matrix = np.zeros((len(records), len(self.columns)), dtype=np.float32)
+        for row, record in zip(matrix, records):
+            self.encode_into(record, row)
+        return matrix
+
+    def encode_valid(self, records):
+        """Encode a batch, skipping records that can't be encoded.
+
+        Returns the matrix of encoded rows, the indices of those records, and
+        ``{index: error message}`` for the rest.
+        """
+        matrix = np.zeros((len(records), len(self.columns)), dtype=np.float32)
+        encoded, errors = [], {}
+        for i, (row, record) in enumerate(zip(matrix, records)):
+            try:
+                self.encode_into(record, row)
+            except (KeyError, TypeError, ValueError) as e:
+                errors[i] = str(e)
+            else:
+                encoded.append(i)
+
+        encoded = np.array(encoded, dtype=np.intp)
+        if errors:
+            matrix = matrix[encoded]
+        return matrix, encoded, errors
@@ -0,0 +1,107 @@
+"""Device price request handling shared by ML/main.py and ML/slim_main.py.
+
+``DeviceInput`` is the request body of /predict_device_price. ``device_record()``
+keys its fields by the training column names for ``DeviceFeatureEncoder``, and
+``device_forecast()`` turns one row of model output into the response.
+
+``predict_devices()`` prices a catalogue for /predict_device_price_batch. Each
+item is validated on its own, so a bad row (not an object, a missing field or
+an unknown category) gets an ``{"error": ...}`` entry instead of failing the
+whole request, and the valid rows go through one model call.
+"""
+from typing import Any, List
+
+from pydantic import BaseModel, ValidationError
+
+
+class DeviceInput(BaseModel):
+    RAM_GB: int
+    Storage_GB: int
+    Screen_Size_inches: float
+    Camera_MP: int
+    Battery_mAh: int
+    Current_Price_USD: float
+    Brand: str
+    CPU: str
+    Screen_Type: str
+
+
+class DeviceBatchRequest(BaseModel):
+    devices: List[Any]
+
+
+# Pydantic has already coerced the field types; strings stay as sent since the encoding is case-sensitive
+def device_cache_key(device: DeviceInput):
+    return tuple(device.dict().values())
+
+
+def device_record(device: DeviceInput):
+    # Input fields keyed by the training column names
+    return {
+        "RAM (GB)": device.RAM_GB,
+        "Storage (GB)": device.Storage_GB,
+        "Screen Size (inches)": device.Screen_Size_inches,
+        "Camera (MP)": device.Camera_MP,
+        "Battery (mAh)": device.Battery_mAh,
+        "Current Price (USD)": device.Current_Price_USD,
+        "Brand": device.Brand,
+        "CPU": device.CPU,
+        "Screen Type": device.Screen_Type,
+    }
+
+
+def device_forecast(predicted_prices):
+    return {
+        "3_months": float(predicted_prices[0]),
+        "6_months": float(predicted_prices[1]),
+        "9_months": float(predicted_prices[2]),
+        "12_months": float(predicted_prices[3])
+    }
+
+
+def parse_device(item):
+    """``(DeviceInput, None)`` for a valid catalogue item, ``(None, error message)`` otherwise."""
+    if not isinstance(item, dict):
+        return None, f"Expected a device object, got {type(item).__name__}"
+    try:
+        return DeviceInput(**item), None
+    except ValidationError as e:
+        return None, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+
+
+def predict_devices(items, encoder, predict, cache=None, generation=None):
+    """Forecast or ``{"error": ...}`` per item, in order; ``predict(matrix)`` runs the model once for the valid rows.
+
+    With a cache, cached devices are reused and new forecasts are stored under ``generation``.
+    """
+    results = [None] * len(items)
+    pending, records = [], []
+
+    for i, item in enumerate(items):
+        device, error = parse_device(item)
+        if error is not None:
+            results[i] = {"error": error}
+            continue
+
+        key = device_cache_key(device)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.append((i, key))
+            records.append(device_record(device))
+
+    # Rows with unknown categories are reported and left out of the batch
+    input_matrix, encoded, errors = encoder.encode_valid(records)
+    for j, message in errors.items():
+        results[pending[j][0]] = {"error": message}
+
+    if len(encoded):
+        prediction = predict(input_matrix).reshape(len(encoded), -1)
+        for j, predicted_prices in zip(encoded, prediction.tolist()):
+            i, key = pending[j]
+            results[i] = device_forecast(predicted_prices)
+            if cache is not None:
+                cache.put(key, results[i], generation=generation)
+
+    return results
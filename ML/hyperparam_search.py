@@ -0,0 +1,161 @@
+"""Successive-halving hyperparameter search for XGBoost, with early stopping.
+
+- Candidates are sampled from a parameter distribution. Each rung trains the
+  survivors on a larger budget of boosting rounds (``eta`` times the previous
+  one) and keeps the best ``1/eta`` of them, so most of the time goes to the
+  promising settings (the inner loop of Hyperband).
+- Every run early-stops on the validation set and is scored by its best
+  validation metric; ``best_iteration`` gives the number of trees to keep.
+- Cores are split explicitly: ``workers`` runs train at the same time with
+  ``nthread = threads // workers`` each, so the total never exceeds ``threads``.
+- Finished runs are appended to a JSON lines checkpoint. Running the same search
+  again (same data, candidates and budgets) reuses them instead of retraining.
+  Runs are keyed by a fingerprint of the training and validation data too, so
+  runs checkpointed on different data are ignored rather than resumed.
+"""
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import xgboost as xgb
+from sklearn.model_selection import ParameterSampler
+
+
+def sample_candidates(param_distributions, n_candidates, seed):
+    # Plain Python values, so candidates are JSON serializable and hash the same on every run
+    return [
+        {key: value.item() if hasattr(value, "item") else value for key, value in sorted(params.items())}
+        for params in ParameterSampler(param_distributions, n_candidates, random_state=seed)
+    ]
+
+
+def rung_budgets(min_rounds, max_rounds, eta):
+    """Boosting rounds per rung: max_rounds, max_rounds // eta, ... down to min_rounds, smallest first."""
+    if eta < 2:
+        raise ValueError(f"eta must be at least 2, got {eta}")
+    if not 1 <= min_rounds <= max_rounds:
+        raise ValueError(f"Need 1 <= min_rounds <= max_rounds, got {min_rounds} and {max_rounds}")
+    budgets = [max_rounds]
+    while budgets[-1] // eta >= min_rounds:
+        budgets.append(budgets[-1] // eta)
+    return budgets[::-1]
+
+
+def split_threads(threads, n_runs, threads_per_model=None):
+    """(runs in parallel, threads per run); their product never exceeds ``threads``."""
+    per_model = min(threads, threads_per_model or max(1, threads // max(1, min(threads, n_runs))))
+    return max(1, min(n_runs, threads // per_model)), per_model
+
+
+def data_fingerprint(*arrays):
+    """Hash of the shapes, column names and values of NumPy arrays or pandas frames."""
+    digest = hashlib.sha1()
+    for array in arrays:
+        if hasattr(array, "index"):
+            import pandas as pd
+            columns = [str(column) for column in getattr(array, "columns", [getattr(array, "name", None)])]
+            digest.update(json.dumps({"shape": array.shape, "columns": columns}).encode("utf-8"))
+            digest.update(pd.util.hash_pandas_object(array).to_numpy().tobytes())
+        else:
+            array = np.ascontiguousarray(array)
+            digest.update(json.dumps({"shape": array.shape, "dtype": array.dtype.str}).encode("utf-8"))
+            digest.update(array.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def run_key(params, rounds, data=None):
+    payload = json.dumps({"params": params, "rounds": rounds, "data": data}, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def load_checkpoint(path):
+    runs = {}
+    if not path or not os.path.exists(path):
+        return runs
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                run = json.loads(line)
+            except json.JSONDecodeError:  # Last line cut short by an interrupted search
+                continue
+            runs[run["key"]] = run
+    return runs
+
+
+def successive_halving(X_train, y_train, X_valid, y_valid, candidates, base_params, threads,
+                       min_rounds=30, max_rounds=300, eta=3, early_stopping_rounds=20,
+                       threads_per_model=None, checkpoint=None, log=print):
+    """Run the search and return ``{"best": run, "runs": [...], "rungs": [...]}``; lower scores are better."""
+    budgets = rung_budgets(min_rounds, max_rounds, eta)  # Checks eta and the rounds before any data is touched
+    data = data_fingerprint(X_train, y_train, X_valid, y_valid)
+    done = load_checkpoint(checkpoint)
+    stale = [key for key, run in done.items() if run.get("data") != data]
+    if stale:
+        log(f"Ignoring {len(stale)} runs in {checkpoint} that were trained on different data")
+        for key in stale:
+            del done[key]
+    lock = threading.Lock()
+
+    # Concurrent runs each take their own (train, valid) pair; pairs are built on demand and reused
+    matrices = queue.SimpleQueue()
+
+    def take_matrices():
+        try:
+            return matrices.get_nowait()
+        except queue.Empty:
+            dtrain = xgb.QuantileDMatrix(X_train, y_train, nthread=threads)
+            return dtrain, xgb.QuantileDMatrix(X_valid, y_valid, ref=dtrain, nthread=threads)
+
+    def train(params, rounds, nthread):
+        key = run_key({**base_params, **params}, rounds, data)
+        if key in done:
+            return dict(done[key], resumed=True)
+
+        dtrain, dvalid = take_matrices()
+        started = time.perf_counter()
+        try:
+            booster = xgb.train(
+                {**base_params, **params, "nthread": nthread}, dtrain,
+                num_boost_round=rounds, evals=[(dvalid, "valid")],
+                early_stopping_rounds=early_stopping_rounds, verbose_eval=False,
+            )
+        finally:
+            matrices.put((dtrain, dvalid))
+
+        run = {
+            "key": key, "data": data, "params": params, "rounds": rounds,
+            "best_iteration": booster.best_iteration, "score": booster.best_score,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        with lock:
+            done[key] = run
+            if checkpoint:
+                with open(checkpoint, "a", encoding="utf-8") as handle:
+                    handle.write(json.dumps(run) + "\n")
+        return run
+
+    survivors, runs, rungs = list(candidates), [], []
+    for i, rounds in enumerate(budgets):
+        workers, per_model = split_threads(threads, len(survivors), threads_per_model)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            rung_runs = list(pool.map(lambda params: train(params, rounds, per_model), survivors))
+        ranked = sorted(rung_runs, key=lambda run: run["score"])
+
+        runs.extend(rung_runs)
+        rungs.append({
+            "rounds": rounds, "candidates": len(survivors), "workers": workers, "threads_per_model": per_model,
+            "resumed": sum(run.get("resumed", False) for run in rung_runs),
+            "seconds": round(time.perf_counter() - started, 3), "best_score": ranked[0]["score"],
+        })
+        log(f"rung {i + 1}/{len(budgets)}: {len(survivors)} candidates x {rounds} rounds, "
+            f"{workers} x {per_model} threads, {rungs[-1]['seconds']:.1f}s, best {ranked[0]['score']:.4f}")
+
+        survivors = [run["params"] for run in ranked[:max(1, len(ranked) // eta)]]
+
+    return {"best": ranked[0], "runs": runs, "rungs": rungs}
@@ -0,0 +1,82 @@
+"""Dedicated thread pool for model inference with per-model admission control.
+
+Each model gets a lane with its own concurrency limit and wait-queue bound.
+The pool has exactly as many threads as the lanes' limits combined, so a burst
+on one model can't take the threads another model needs. When a lane's queue
+is full, ``run()`` raises ``InferenceBusy`` right away instead of queueing
+more work; the apps turn that into a 503.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class InferenceBusy(Exception):
+    def __init__(self, model_name):
+        super().__init__(f"Too many pending '{model_name}' requests, try again later")
+        self.model_name = model_name
+
+
+def parse_limits(spec, defaults=None):
+    # "sentiment=2,deal=4" -> {"sentiment": 2, "deal": 4}, over the defaults for lanes the spec leaves out
+    limits = dict(defaults or {})
+    for part in spec.split(","):
+        if part.strip():
+            name, value = part.split("=")
+            limits[name.strip()] = int(value)
+    return limits
+
+
+class _Lane:
+    def __init__(self, limit, max_queue):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.semaphore = asyncio.Semaphore(limit)
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+
+
+class InferenceExecutor:
+    def __init__(self, limits, max_queue=32):
+        if not limits:
+            raise ValueError("At least one model lane is required")
+        self.lanes = {name: _Lane(limit, max_queue) for name, limit in limits.items()}
+        self.pool = ThreadPoolExecutor(max_workers=sum(limits.values()), thread_name_prefix="inference")
+
+    async def run(self, model_name, fn, *args):
+        lane = self.lanes[model_name]
+        if lane.waiting + lane.running >= lane.limit + lane.max_queue:
+            lane.rejected += 1
+            raise InferenceBusy(model_name)
+
+        lane.waiting += 1
+        try:
+            await lane.semaphore.acquire()
+        finally:
+            lane.waiting -= 1
+
+        lane.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, functools.partial(fn, *args))
+        finally:
+            lane.running -= 1
+            lane.completed += 1
+            lane.semaphore.release()
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
+
+    def metrics(self):
+        return {
+            name: {
+                "limit": lane.limit,
+                "max_queue": lane.max_queue,
+                "running": lane.running,
+                "waiting": lane.waiting,
+                "completed": lane.completed,
+                "rejected": lane.rejected,
+            }
+            for name, lane in self.lanes.items()
+        }
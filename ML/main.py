@@ -1,24 +1,76 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-import tensorflow as tf
-import pickle
+import os
 import joblib
 import numpy as np
 import pandas as pd
+from types import SimpleNamespace
 from typing import List
-from tensorflow.keras.preprocessing.sequence import pad_sequences
 from xgboost import XGBClassifier
+from deal_features import adjust_deals, deal_features
+from device_features import DeviceFeatureEncoder
+from device_inputs import DeviceBatchRequest, DeviceInput, device_cache_key, device_forecast, device_record, predict_devices
+from inference_executor import InferenceBusy, InferenceExecutor, parse_limits
+from micro_batcher import MicroBatcher
+from model_registry import ModelLoadError, ModelRegistry
+from product_index import ProductIndex
+from registry_routes import admin_router
+from result_cache import LRUCache
+from sentiment_inference import load_sentiment_model, load_vectorizer, padding_buckets, predict_sentiment_batch
 
 # Initialize FastAPI app
 app = FastAPI()
 
+# Dedicated inference threads with a concurrency limit per model; INFERENCE_CONCURRENCY="sentiment=4" overrides just that lane
+inference = InferenceExecutor(
+    parse_limits(os.environ.get("INFERENCE_CONCURRENCY", ""), defaults={"sentiment": 2, "deal": 2, "device_price": 2}),
+    max_queue=int(os.environ.get("INFERENCE_MAX_QUEUE", "32")),
+)
+
+# Fail fast when a model's queue is full
+@app.exception_handler(InferenceBusy)
+async def inference_busy_handler(request, exc):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.get("/inference/metrics")
+def get_inference_metrics():
+    return inference.metrics()
+
+# Models load in parallel in the background; models not listed in PRELOAD_MODELS load on first use.
+# With MODEL_REGISTRY_DIR set, artifacts come from <dir>/<model>/<version>/ and can be hot reloaded.
+registry = ModelRegistry(root=os.environ.get("MODEL_REGISTRY_DIR"))
+PRELOAD_MODELS = os.environ.get("PRELOAD_MODELS", "sentiment,deal,device_price").split(",")
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+@app.exception_handler(ModelLoadError)
+async def model_load_error_handler(request, exc):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+# /healthz, /readyz and /admin/models/{name}/reload (disabled unless ADMIN_TOKEN is set)
+app.include_router(admin_router(registry, admin_token=ADMIN_TOKEN))
+
 # ====================== Sentiment Analysis Section ======================
-# Load Sentiment Analysis Model (LSTM)
-model_sentiment = tf.keras.models.load_model("sentiment_lstm.h5")
+# SENTIMENT_BACKEND=tflite serves the quantized sentiment_lstm.tflite instead of the Keras model,
+# with TFLITE_THREADS interpreter threads per worker
+SENTIMENT_BACKEND = os.environ.get("SENTIMENT_BACKEND", "keras")
+TFLITE_THREADS = int(os.environ.get("TFLITE_THREADS", "1"))
+
+# Load Sentiment Analysis Model (LSTM), its vocabulary and the padding buckets for batch requests
+def load_sentiment(path):
+    model = load_sentiment_model(path, SENTIMENT_BACKEND, TFLITE_THREADS)
+    
+    return SimpleNamespace(model=model, vectorizer=load_vectorizer(path), buckets=padding_buckets(model))
+
+registry.register("sentiment", load_sentiment, eager="sentiment" in PRELOAD_MODELS)
 
-# Load Tokenizer for Sentiment Analysis
-with open("tokenizer.pkl", "rb") as handle:
-    tokenizer = pickle.load(handle)
+# Cache of recent scores keyed on the token ids, so repeated feedback differing only in case or punctuation
+# shares an entry; emptied whenever a new model version (model and vocabulary) is swapped in
+sentiment_cache = LRUCache(
+    max_size=int(os.environ.get("SENTIMENT_CACHE_SIZE", "8192")),
+    ttl=float(os.environ.get("SENTIMENT_CACHE_TTL", "0")) or None,
+)
+registry.add_listener("sentiment", lambda version: sentiment_cache.clear())
 
 # Request and Response Models
 class SentimentAnalysisRequest(BaseModel):
@@ -28,30 +80,67 @@ class SentimentResponse(BaseModel):
     sentiment: str
     confidence: float
 
-# Function for sentiment analysis
-def predict_sentiment(text: str, model, tokenizer, max_len=50):
-    sequence = tokenizer.texts_to_sequences([text])
-    padded_sequence = pad_sequences(sequence, maxlen=max_len)
-    
-    prediction = model.predict(padded_sequence)[0][0]
-    sentiment = "Positive" if prediction > 0.5 else "Negative"
-    confidence = prediction if prediction > 0.5 else 1 - prediction
-    
-    return sentiment, confidence
+class SentimentBatchRequest(BaseModel):
+    texts: List[str]
+
+class SentimentBatchResponse(BaseModel):
+    results: List[SentimentResponse]
+
+def score_sentiment(texts):
+    generation = sentiment_cache.generation
+    sentiment = registry.get("sentiment")
+    return predict_sentiment_batch(
+        texts, sentiment.model, sentiment.vectorizer, buckets=sentiment.buckets,
+        cache=sentiment_cache, generation=generation,
+    )
+
+# Concurrent requests are grouped into one LSTM call
+sentiment_batcher = MicroBatcher(
+    score_sentiment,
+    max_batch_size=int(os.environ.get("SENTIMENT_MAX_BATCH_SIZE", "32")),
+    max_wait_ms=float(os.environ.get("SENTIMENT_MAX_WAIT_MS", "5")),
+    max_queue_size=int(os.environ.get("SENTIMENT_MAX_QUEUE", "1024")),
+    run=lambda fn, texts: inference.run("sentiment", fn, texts),
+    name="sentiment",
+)
 
 # API Endpoint for Sentiment Analysis
 @app.post("/predict_sentiment/", response_model=SentimentResponse)
-def get_predicted_sentiment(request: SentimentAnalysisRequest):
-    sentiment, confidence = predict_sentiment(request.text, model_sentiment, tokenizer)
+async def get_predicted_sentiment(request: SentimentAnalysisRequest):
+    sentiment, confidence = await sentiment_batcher.submit(request.text)
     return SentimentResponse(sentiment=sentiment, confidence=confidence)
 
+@app.post("/predict_sentiment_batch/", response_model=SentimentBatchResponse)
+async def get_predicted_sentiment_batch(request: SentimentBatchRequest):
+    results = await inference.run("sentiment", score_sentiment, request.texts)
+    return SentimentBatchResponse(results=[
+        SentimentResponse(sentiment=sentiment, confidence=confidence) for sentiment, confidence in results
+    ])
+
+@app.get("/predict_sentiment/metrics")
+def get_sentiment_batcher_metrics():
+    return {**sentiment_batcher.metrics(), "cache": sentiment_cache.metrics()}
+
 # ====================== Product Deal Prediction Section ======================
+NORMALIZE_PRODUCT_NAMES = os.environ.get("NORMALIZE_PRODUCT_NAMES", "0") == "1"
+
 # Load Product Deal Prediction Model and Encoders
-xgb_model = XGBClassifier()
-xgb_model.load_model('best_xgb_model.json')  # Load model saved as JSON
+def load_deal(path):
+    xgb_model = XGBClassifier()
+    xgb_model.load_model(os.path.join(path, 'best_xgb_model.json'))  # Load model saved as JSON
+    xgb_model.predict(np.zeros((1, xgb_model.n_features_in_)))  # Warm up
+    
+    le_product = joblib.load(os.path.join(path, 'product_encoder.pkl'))
+    le_deal = joblib.load(os.path.join(path, 'deal_encoder.pkl'))
+    
+    # Name -> code index and decoded labels, so the encoders are not used per request
+    return SimpleNamespace(
+        model=xgb_model,
+        product_index=ProductIndex.from_encoder(le_product, normalize=NORMALIZE_PRODUCT_NAMES),
+        labels=le_deal.classes_.astype(object),
+    )
 
-le_product = joblib.load('product_encoder.pkl')
-le_deal = joblib.load('deal_encoder.pkl')
+registry.register("deal", load_deal, eager="deal" in PRELOAD_MODELS)
 
 # Input Models
 class ProductInput(BaseModel):
@@ -62,121 +151,99 @@ class ProductInput(BaseModel):
 class ProductList(BaseModel):
     items: List[ProductInput]
 
-# Prediction endpoint
-@app.post("/predict_deal")
-def predict_bulk(data: ProductList):
-    sample_data = [item.dict() for item in data.items]
-    df_sample = pd.DataFrame(sample_data)
-    avg_price_dict = df_sample.groupby('product')['price'].mean().to_dict()
+# Bulk deal prediction for a list of ProductInput
+def predict_deal_items(items):
+    deal = registry.get("deal")
+    df_sample = pd.DataFrame([item.dict() for item in items], columns=['product', 'price', 'distance'])
+    predictions = df_sample.assign(prediction="Unknown Product")
     
-    predictions = []
+    # Handle unknown products
+    codes, _ = deal.product_index.lookup(df_sample['product'])
+    known = codes >= 0
     
-    for data in sample_data:
-        product_name = data['product']
-        price = data['price']
-        distance = data['distance']
-        
-        # Handle unknown products
-        if product_name not in le_product.classes_:
-            predictions.append({"product": product_name, "price": price, "distance": distance, "prediction": "Unknown Product"})
-            continue
-        
-        product_encoded = le_product.transform([product_name])[0]
-        avg_price = avg_price_dict.get(product_name, price)
-        price_deviation = (price - avg_price) / avg_price
-        price_per_distance = price / (distance + 1)
+    if known.any():
+        price = df_sample['price'].to_numpy(dtype=float)[known]
+        distance = df_sample['distance'].to_numpy(dtype=float)[known]
         
-        input_data = pd.DataFrame([{
-            'product_encoded': product_encoded, 
-            'price': price, 
-            'distance': distance, 
-            'avg_price': avg_price, 
-            'price_deviation': price_deviation, 
-            'price_per_distance': price_per_distance
-        }])
+        # One feature matrix for the whole request; avg_price is per product over the known products in the request
+        input_data, price_deviation = deal_features(codes[known], price, distance)
         
         # Make prediction
-        prediction_encoded = xgb_model.predict(input_data)[0]
-        predicted_deal = le_deal.inverse_transform([prediction_encoded])[0]
+        predicted_deal = adjust_deals(deal.labels[deal.model.predict(input_data)], price_deviation)
         
-        if predicted_deal == 'Good' and price_deviation < -0.1:
-            predicted_deal = 'Excellent'
-        elif predicted_deal == 'Fair' and price_deviation > 0.1:
-            predicted_deal = 'Bad'
-        
-        predictions.append({"product": product_name, "price": price, "distance": distance, "prediction": predicted_deal})
+        predictions.loc[known, 'prediction'] = predicted_deal
     
-    return {"predictions": predictions}
+    return {"predictions": predictions.to_dict(orient='records')}
+
+# Prediction endpoint
+@app.post("/predict_deal")
+async def predict_bulk(data: ProductList):
+    return await inference.run("deal", predict_deal_items, data.items)
 
 # ====================== Device Price Prediction Section ======================
 # Load Device Price Prediction Model
-device_model = joblib.load("device_price_prediction_model_xgb.pkl")
-
-# Expected columns after One-Hot Encoding
-expected_columns = [
-    'RAM (GB)', 'Storage (GB)', 'Screen Size (inches)', 'Camera (MP)', 'Battery (mAh)', 
-    'Current Price (USD)', 
-    'Brand_Google', 'Brand_Huawei', 'Brand_OnePlus', 'Brand_Oppo', 'Brand_Samsung', 'Brand_Xiaomi', 
-    'CPU_A15 Bionic', 'CPU_A16 Bionic', 'CPU_Dimensity 8000', 'CPU_Dimensity 8100', 'CPU_Exynos 2100', 
-    'CPU_Exynos 990', 'CPU_Google Tensor', 'CPU_Google Tensor G2', 'CPU_Kirin 9000', 'CPU_Kirin 990', 
-    'CPU_Snapdragon 732G', 'CPU_Snapdragon 778G', 'CPU_Snapdragon 8 Gen 1', 'CPU_Snapdragon 8 Gen 2', 
-    'CPU_Snapdragon 8+ Gen 1', 'CPU_Snapdragon 865', 'CPU_Snapdragon 870', 'CPU_Snapdragon 888', 
-    'Screen Type_LCD', 'Screen Type_OLED'
-]
-
-# Input Model
-class DeviceInput(BaseModel):
-    RAM_GB: int
-    Storage_GB: int
-    Screen_Size_inches: float
-    Camera_MP: int
-    Battery_mAh: int
-    Current_Price_USD: float
-    Brand: str
-    CPU: str
-    Screen_Type: str
-
-@app.post("/predict_device_price")
-def predict_price(device: DeviceInput):
+def load_device_price(path):
+    device_model = joblib.load(os.path.join(path, "device_price_prediction_model_xgb.pkl"))
+    # One-hot layout resolved once per model version, from the columns it was trained on
+    encoder = DeviceFeatureEncoder.from_model(device_model)
+    device_model.predict(np.zeros((1, len(encoder.columns)), dtype=np.float32))  # Warm up
+    return SimpleNamespace(model=device_model, encoder=encoder)
+
+registry.register("device_price", load_device_price, eager="device_price" in PRELOAD_MODELS)
+
+# Cache of recent predictions, emptied whenever a new model version is swapped in
+device_price_cache = LRUCache(
+    max_size=int(os.environ.get("DEVICE_PRICE_CACHE_SIZE", "4096")),
+    ttl=float(os.environ.get("DEVICE_PRICE_CACHE_TTL", "3600")),
+)
+registry.add_listener("device_price", lambda version: device_price_cache.clear())
+
+def predict_device_price(device: DeviceInput):
+    generation = device_price_cache.generation
+    device_price = registry.get("device_price")
     try:
-        # Convert input to DataFrame
-        input_data = {
-            "RAM (GB)": device.RAM_GB,
-            "Storage (GB)": device.Storage_GB,
-            "Screen Size (inches)": device.Screen_Size_inches,
-            "Camera (MP)": device.Camera_MP,
-            "Battery (mAh)": device.Battery_mAh,
-            "Current Price (USD)": device.Current_Price_USD,
-            "Brand": device.Brand,
-            "CPU": device.CPU,
-            "Screen Type": device.Screen_Type,
-        }
-        input_df = pd.DataFrame([input_data])
-        
-        # Apply One-Hot Encoding
-        input_df = pd.get_dummies(input_df)
-        
-        # Ensure all expected columns are present
-        for col in expected_columns:
-            if col not in input_df.columns:
-                input_df[col] = 0  # Fill missing columns with zero
-        
-        # Order columns as expected by the model
-        input_df = input_df[expected_columns]
+        # One-hot encode straight into a preallocated row; unknown categories raise
+        input_matrix = device_price.encoder.encode([device_record(device)])
         
         # Make prediction
-        prediction = device_model.predict(input_df)
+        prediction = device_price.model.predict(input_matrix)
         predicted_prices = prediction.flatten().tolist()  # Convert NumPy array to a standard Python list
 
-        return {
-            "3_months": float(predicted_prices[0]),
-            "6_months": float(predicted_prices[1]),
-            "9_months": float(predicted_prices[2]),
-            "12_months": float(predicted_prices[3])
-        }
+        result = device_forecast(predicted_prices)
+        device_price_cache.put(device_cache_key(device), result, generation=generation)
+        return result
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/predict_device_price")
+async def predict_price(device: DeviceInput):
+    # Cache hits are answered without going through the inference executor
+    cached = device_price_cache.get(device_cache_key(device))
+    if cached is not None:
+        return cached
+    return await inference.run("device_price", predict_device_price, device)
+
+# Bulk device price prediction: each device is validated on its own, cached devices are reused
+# and the rest go through one model call
+def predict_device_price_items(items):
+    generation = device_price_cache.generation
+    device_price = registry.get("device_price")
+    results = predict_devices(items, device_price.encoder, device_price.model.predict,
+                              cache=device_price_cache, generation=generation)
+    return {"predictions": results}
+
+@app.post("/predict_device_price_batch")
+async def predict_price_batch(request: DeviceBatchRequest):
+    return await inference.run("device_price", predict_device_price_items, request.devices)
+
+@app.get("/predict_device_price/metrics")
+def get_device_price_cache_metrics():
+    return device_price_cache.metrics()
+
+# Start loading models in the background, and pick up newly published versions if MODEL_WATCH_INTERVAL is set
+registry.load_all()
+registry.watch(float(os.environ.get("MODEL_WATCH_INTERVAL", "0")))
+
 # Run the FastAPI server using:
 # uvicorn combined_api:app --reload
\ No newline at end of file
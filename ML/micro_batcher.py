@@ -0,0 +1,120 @@
+"""Asyncio micro-batching in front of a batch predict function.
+
+Concurrent ``submit()`` calls are queued and grouped into one batch of up to
+``max_batch_size`` items, waiting at most ``max_wait_ms`` after the first item
+arrives. The batch runs once off the event loop and each caller gets its own
+result back.
+
+``run`` decides where a batch executes (e.g. an ``InferenceExecutor`` lane);
+by default it goes to the event loop's default thread pool. Once
+``max_queue_size`` items are waiting, ``submit()`` raises ``InferenceBusy``.
+"""
+import asyncio
+import time
+
+from inference_executor import InferenceBusy
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5.0, max_queue_size=None, run=None, name="batch"):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue_size = max_queue_size
+        self.run = run or self._run_in_default_executor
+        self.name = name
+        self._queue = None
+        self._worker = None
+
+        # Metrics
+        self.max_queue_depth = 0
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.rejected = 0
+        self.last_batch_size = 0
+        self.last_batch_ms = 0.0
+
+    async def submit(self, item):
+        self._ensure_worker()
+        if self.max_queue_size is not None and self._queue.qsize() >= self.max_queue_size:
+            self.rejected += 1
+            raise InferenceBusy(self.name)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+
+    def _ensure_worker(self):
+        # Started lazily so the queue and task belong to the server's event loop
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    @staticmethod
+    async def _run_in_default_executor(fn, items):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, items)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Drop callers that went away while waiting
+            batch = [(item, future) for item, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                results = await self.run(self.predict_fn, [item for item, _ in batch])
+            except Exception as e:
+                self.errors += 1
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+            self.batches += 1
+            self.items += len(batch)
+            self.last_batch_size = len(batch)
+            self.last_batch_ms = (time.perf_counter() - started) * 1000
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def metrics(self):
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_ms": self.last_batch_ms,
+        }
@@ -0,0 +1,233 @@
+"""Background, parallel model loading with per-model status and hot reload.
+
+Every model is registered with a loader function that takes the directory
+holding its artifacts. ``load_all()`` starts the eager ones on a small thread
+pool at once; the rest load on their first ``get()``. ``status()`` backs the
+/healthz and /readyz endpoints.
+
+With a registry root, artifacts are versioned as ``<root>/<model>/<version>/``
+and ``<root>/<model>/CURRENT`` names the version to serve (the newest version
+directory if there is no pointer). ``reload()`` loads a version in the
+background and swaps it in once it is ready; requests that already hold the
+old model finish on it. Reloading an explicit version (e.g. a rollback) also
+points ``CURRENT`` at it, so ``watch()`` doesn't switch straight back. A reload
+while another load of the same model is running raises ``ReloadInProgress``
+instead of dropping the requested version. Without a root, artifacts are read
+from the working directory as version "local". ``add_listener()`` callbacks
+run after every swap, e.g. to clear result caches computed by the previous
+version.
+
+A failed load is not permanent: the next ``get()`` after ``retry_interval``
+seconds tries again, and calls in between fail fast with the same error.
+"""
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+CURRENT_FILE = "CURRENT"
+
+
+class ModelLoadError(Exception):
+    def __init__(self, name, error):
+        super().__init__(f"Model '{name}' is not available: {error}")
+        self.name = name
+        self.error = error
+
+
+class ReloadInProgress(Exception):
+    def __init__(self, name):
+        super().__init__(f"Model '{name}' is already loading, try again when it finishes")
+        self.name = name
+
+
+def check_version(version):
+    # A version is one directory directly under <root>/<model>/, never a path that leaves it
+    if not version or version in (".", "..") or os.path.basename(version) != version or (os.altsep and os.altsep in version):
+        raise ValueError(f"Invalid version '{version}'")
+
+
+class _Entry:
+    def __init__(self, loader, eager):
+        self.loader = loader
+        self.eager = eager
+        self.future = None
+        self.model = None
+        self.version = None
+        self.error = None
+        self.failed_version = None
+        self.failed_at = None
+        self.load_seconds = None
+        self.loaded_at = None
+        self.listeners = []
+
+    @property
+    def loading(self):
+        return self.future is not None and not self.future.done()
+
+    @property
+    def status(self):
+        if self.model is not None:
+            return "reloading" if self.loading else "ready"
+        if self.loading:
+            return "loading"
+        return "failed" if self.error is not None else "not_loaded"
+
+
+class ModelRegistry:
+    def __init__(self, root=None, max_workers=4, retry_interval=5.0):
+        self.root = root
+        self.retry_interval = retry_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-loader")
+
+    def register(self, name, loader, eager=True):
+        self._entries[name] = _Entry(loader, eager)
+
+    def add_listener(self, name, callback):
+        """Call ``callback(version)`` each time a (new) version of ``name`` is swapped in."""
+        self._entries[name].listeners.append(callback)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def resolve(self, name, version=None):
+        """Return ``(version, artifact directory)`` for the requested or current version."""
+        if self.root is None:
+            return "local", "."
+
+        model_dir = os.path.join(self.root, name)
+        if version is None:
+            pointer = os.path.join(model_dir, CURRENT_FILE)
+            if os.path.exists(pointer):
+                with open(pointer) as handle:
+                    version = handle.read().strip()
+            else:
+                versions = sorted(d for d in os.listdir(model_dir) if os.path.isdir(os.path.join(model_dir, d)))
+                if not versions:
+                    raise FileNotFoundError(f"No versions of '{name}' in {model_dir}")
+                version = versions[-1]
+
+        check_version(version)
+        path = os.path.join(model_dir, version)
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"Version '{version}' of '{name}' not found in {model_dir}")
+        return version, path
+
+    def load_all(self):
+        for name, entry in self._entries.items():
+            if entry.eager:
+                self.start(name)
+
+    def start(self, name):
+        entry = self._entries[name]
+        with self._lock:
+            if entry.future is None or self._should_retry(entry):
+                entry.future = self._pool.submit(self._load, name, entry, None)
+            return entry.future
+
+    def _should_retry(self, entry):
+        # The last load failed (temporary filesystem or artifact error?) and the backoff has passed
+        return (
+            entry.future.done() and entry.future.exception() is not None
+            and (entry.failed_at is None or time.monotonic() - entry.failed_at >= self.retry_interval)
+        )
+
+    def reload(self, name, version=None):
+        """Load ``version`` (default: current) in the background and swap it in when ready."""
+        entry = self._entries[name]
+        with self._lock:
+            if entry.loading:
+                raise ReloadInProgress(name)
+            entry.future = self._pool.submit(self._load, name, entry, version, version is not None)
+            return entry.future
+
+    def _load(self, name, entry, version, pin=False):
+        started = time.perf_counter()
+        try:
+            version, path = self.resolve(name, version)
+            model = entry.loader(path)  # loaders warm their model up before returning
+            if pin and self.root is not None:
+                set_current_version(self.root, name, version)
+        except Exception as e:
+            entry.error = e
+            entry.failed_version = version
+            entry.failed_at = time.monotonic()
+            raise
+        finally:
+            entry.load_seconds = time.perf_counter() - started
+
+        with self._lock:
+            entry.model, entry.version, entry.error = model, version, None
+            entry.loaded_at = time.time()
+        for callback in entry.listeners:
+            callback(version)
+        return model
+
+    def get(self, name, timeout=None):
+        """Return the loaded model, loading it first (or waiting for it) if needed."""
+        model = self._entries[name].model
+        if model is not None:
+            return model
+        try:
+            return self.start(name).result(timeout)
+        except Exception as e:
+            raise ModelLoadError(name, e) from e
+
+    def watch(self, interval):
+        """Poll the registry root and reload any model whose current version changed."""
+        def poll():
+            while True:
+                time.sleep(interval)
+                for name, entry in self._entries.items():
+                    if entry.model is None or entry.loading:
+                        continue
+                    try:
+                        version, _ = self.resolve(name)
+                    except Exception:
+                        continue
+                    if version not in (entry.version, entry.failed_version):
+                        try:
+                            self.reload(name)
+                        except ReloadInProgress:  # An admin reload got there first
+                            pass
+
+        if self.root is not None and interval > 0:
+            threading.Thread(target=poll, name="model-watcher", daemon=True).start()
+
+    def ready(self):
+        return all(entry.status in ("ready", "reloading") for entry in self._entries.values() if entry.eager)
+
+    def status(self):
+        return {
+            name: {
+                "status": entry.status,
+                "version": entry.version,
+                "eager": entry.eager,
+                "load_seconds": entry.load_seconds,
+                "loaded_at": entry.loaded_at,
+                "error": str(entry.error) if entry.error is not None else None,
+            }
+            for name, entry in self._entries.items()
+        }
+
+
+def publish_version(root, name, files, version=None):
+    """Copy freshly trained artifacts to ``<root>/<name>/<version>/`` and make it the current version."""
+    version = version or time.strftime("%Y%m%d-%H%M%S")
+    target = os.path.join(root, name, version)
+    os.makedirs(target, exist_ok=True)
+    for file in files:
+        shutil.copy2(file, target)
+    set_current_version(root, name, version)
+    return target
+
+
+def set_current_version(root, name, version):
+    # Write the pointer atomically so a watcher never reads a half-written version
+    pointer = os.path.join(root, name, CURRENT_FILE)
+    with open(pointer + ".tmp", "w") as handle:
+        handle.write(version)
+    os.replace(pointer + ".tmp", pointer)
@@ -0,0 +1,59 @@
+"""Product catalogue index for the deal models.
+
+Built once at startup from a fitted product LabelEncoder, so deal prediction
+can resolve a product name to its encoded value (and reference average price)
+with a dict lookup instead of scanning ``classes_`` / calling ``transform``.
+"""
+import numpy as np
+
+
+def normalize_product_name(name):
+    # "  iPhone   13 " and "iphone 13" map to the same key
+    return " ".join(str(name).split()).casefold()
+
+
+class ProductIndex:
+    def __init__(self, names, price_ranges=None, normalize=False):
+        self.normalize = normalize
+        self.names = [str(name) for name in names]
+        self.codes = {}
+        self.avg_prices = {}
+        price_ranges = price_ranges or {}
+
+        for code, name in enumerate(self.names):
+            key = self.key(name)
+            if key in self.codes:
+                raise ValueError(f"Product names '{self.names[self.codes[key]]}' and '{name}' collide after normalization")
+            self.codes[key] = code
+            if name in price_ranges:
+                low, high = price_ranges[name]
+                self.avg_prices[key] = (low + high) / 2
+
+    @classmethod
+    def from_encoder(cls, encoder, price_ranges=None, normalize=False):
+        # LabelEncoder codes are the positions in classes_
+        return cls(encoder.classes_, price_ranges=price_ranges, normalize=normalize)
+
+    def key(self, name):
+        return normalize_product_name(name) if self.normalize else name
+
+    def __contains__(self, name):
+        return self.key(name) in self.codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def get(self, name):
+        """Return ``(code, avg_price)`` for a product, or ``None`` if it is unknown."""
+        key = self.key(name)
+        code = self.codes.get(key)
+        if code is None:
+            return None
+        return code, self.avg_prices.get(key, np.nan)
+
+    def lookup(self, names):
+        """Vectorized lookup: codes (-1 for unknown products) and average prices (NaN if unknown)."""
+        keys = [self.key(name) for name in names]
+        codes = np.fromiter((self.codes.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+        avg_prices = np.fromiter((self.avg_prices.get(key, np.nan) for key in keys), dtype=float, count=len(keys))
+        return codes, avg_prices
@@ -0,0 +1,60 @@
+"""Health, readiness and admin reload endpoints for a ``ModelRegistry``.
+
+``admin_router(registry, admin_token)`` returns the routes every app serves on
+top of its prediction endpoints:
+
+- ``GET /healthz``: the process is up, with each model's load status.
+- ``GET /readyz``: 200 once every preloaded model is ready, 503 before.
+- ``POST /admin/models/{name}/reload?version=...``: load a version in the
+  background and swap it in. It is disabled (404) unless an admin token is
+  configured, and callers send the token in the ``X-Admin-Token`` header.
+  While another load of the model is running it answers 409, so a requested
+  version is never silently dropped.
+"""
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import JSONResponse
+
+from model_registry import ReloadInProgress
+
+
+def admin_router(registry, admin_token=None):
+    router = APIRouter()
+
+    # Liveness: the process is up, whatever the models are doing
+    @router.get("/healthz")
+    def healthz():
+        return {"status": "ok", "models": registry.status()}
+
+    # Readiness: every preloaded model is ready
+    @router.get("/readyz")
+    def readyz():
+        if not registry.ready():
+            return JSONResponse(status_code=503, content={"status": "not_ready", "models": registry.status()})
+        return {"status": "ready", "models": registry.status()}
+
+    # Load a new version in the background and swap it in; in-flight requests finish on the old one
+    @router.post("/admin/models/{name}/reload", status_code=202)
+    def reload_model(name: str, version: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+        if not admin_token:
+            raise HTTPException(status_code=404, detail="Admin endpoints are disabled, set ADMIN_TOKEN to enable them")
+        if not hmac.compare_digest((x_admin_token or "").encode(), admin_token.encode()):
+            raise HTTPException(status_code=403, detail="Invalid admin token")
+        if name not in registry:
+            raise HTTPException(status_code=404, detail=f"Unknown model '{name}'")
+        try:
+            registry.resolve(name, version)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+
+        try:
+            registry.reload(name, version)
+        except ReloadInProgress as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return {"model": name, "requested_version": version, **registry.status()[name]}
+
+    return router
@@ -0,0 +1,203 @@
+"""Offline bulk scoring: ``python score.py MODEL INPUT OUTPUT``.
+
+Streams INPUT (.parquet, .feather/.arrow or .csv) in chunks, scores each chunk
+with one batched prediction through the same feature encoding as the API and
+writes the input columns plus the predictions to OUTPUT, in input order.
+
+- ``deal``: columns product, price, distance -> ``prediction`` ("Unknown
+  Product" when the model doesn't know the product). ``avg_price`` is the mean
+  price of the product over the whole file, taken in a first pass over the
+  product and price columns, as if the file were posted as one request.
+- ``device_price``: the training columns (Brand, CPU, RAM (GB), ...) ->
+  ``3_months`` .. ``12_months``, or ``error`` for rows that can't be encoded.
+- ``sentiment``: a text column -> ``sentiment``, ``confidence``.
+
+Artifacts come from --model-dir, or from the model registry (--registry or
+MODEL_REGISTRY_DIR; the current version unless --version is given). With
+--workers N, chunks are scored by N processes that each load the model once,
+with at most 2N chunks in flight.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from dataset_io import iter_dataset, write_dataset
+from model_registry import ModelRegistry
+
+MODELS = ("deal", "device_price", "sentiment")
+NORMALIZE_PRODUCT_NAMES = os.environ.get("NORMALIZE_PRODUCT_NAMES", "0") == "1"
+PRICE_HORIZONS = ("3_months", "6_months", "9_months", "12_months")
+
+
+# ====================== Loaders (same artifacts as the API) ======================
+def load_product_index(path):
+    import joblib
+    from product_index import ProductIndex
+    return ProductIndex.from_encoder(joblib.load(os.path.join(path, "product_encoder.pkl")), normalize=NORMALIZE_PRODUCT_NAMES)
+
+
+def load_deal(path, options):
+    import joblib
+    from xgboost import XGBClassifier
+
+    model = XGBClassifier()
+    model.load_model(os.path.join(path, "best_xgb_model.json"))
+    model.set_params(n_jobs=options.threads)
+    labels = joblib.load(os.path.join(path, "deal_encoder.pkl")).classes_.astype(object)
+    return SimpleNamespace(model=model, product_index=load_product_index(path), labels=labels)
+
+
+def load_device_price(path, options):
+    import joblib
+    from device_features import DeviceFeatureEncoder
+
+    model = joblib.load(os.path.join(path, "device_price_prediction_model_xgb.pkl"))
+    model.set_params(n_jobs=options.threads)
+    return SimpleNamespace(model=model, encoder=DeviceFeatureEncoder.from_model(model))
+
+
+def load_sentiment(path, options):
+    from sentiment_inference import load_sentiment_model, load_vectorizer, padding_buckets
+
+    model = load_sentiment_model(path, options.backend, options.threads)
+    return SimpleNamespace(model=model, vectorizer=load_vectorizer(path), buckets=padding_buckets(model))
+
+
+# ====================== Scoring one chunk ======================
+def score_deal(deal, chunk, options):
+    from deal_features import adjust_deals, deal_features
+
+    codes, _ = deal.product_index.lookup(chunk["product"])
+    known = codes >= 0
+    prediction = np.full(len(chunk), "Unknown Product", dtype=object)
+
+    if known.any():
+        input_data, price_deviation = deal_features(
+            codes[known],
+            chunk["price"].to_numpy(dtype=float)[known],
+            chunk["distance"].to_numpy(dtype=float)[known],
+            avg_price=options.average_prices[codes[known]],
+        )
+        prediction[known] = adjust_deals(deal.labels[deal.model.predict(input_data)], price_deviation)
+
+    return chunk.assign(prediction=pd.array(prediction, dtype="string"))
+
+
+def score_device_price(device_price, chunk, options):
+    input_matrix, encoded, errors = device_price.encoder.encode_valid(chunk.to_dict(orient="records"))
+    prices = np.full((len(chunk), len(PRICE_HORIZONS)), np.nan)
+    if len(encoded):
+        prices[encoded] = device_price.model.predict(input_matrix).reshape(len(encoded), -1)
+
+    error = pd.array([None] * len(chunk), dtype="string")
+    for i, message in errors.items():
+        error[i] = message
+    return chunk.assign(**{horizon: prices[:, j] for j, horizon in enumerate(PRICE_HORIZONS)}, error=error)
+
+
+def score_sentiment(sentiment, chunk, options):
+    from sentiment_inference import predict_sentiment_batch
+
+    texts = chunk[options.text_column].fillna("").astype(str).tolist()
+    results = predict_sentiment_batch(texts, sentiment.model, sentiment.vectorizer, buckets=sentiment.buckets)
+    return chunk.assign(
+        sentiment=pd.array([label for label, _ in results], dtype="string"),
+        confidence=np.array([confidence for _, confidence in results], dtype=float),
+    )
+
+
+LOADERS = {"deal": load_deal, "device_price": load_device_price, "sentiment": load_sentiment}
+SCORERS = {"deal": score_deal, "device_price": score_device_price, "sentiment": score_sentiment}
+
+
+# ====================== Deal averages over the whole file ======================
+def deal_average_prices(path, product_index, chunk_size):
+    """Mean price per product code over every row of the file whose product is known."""
+    sums = counts = np.zeros(0)
+    for chunk in iter_dataset(path, columns=["product", "price"], chunk_size=chunk_size):
+        codes, _ = product_index.lookup(chunk["product"])
+        known = codes >= 0
+        chunk_sums = np.bincount(codes[known], weights=chunk["price"].to_numpy(dtype=float)[known], minlength=len(sums))
+        chunk_counts = np.bincount(codes[known], minlength=len(sums))
+        sums = np.pad(sums, (0, len(chunk_sums) - len(sums))) + chunk_sums
+        counts = np.pad(counts, (0, len(chunk_counts) - len(counts))) + chunk_counts
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+# ====================== Workers ======================
+_worker = None
+
+
+def init_worker(model_name, path, options):
+    global _worker
+    _worker = (LOADERS[model_name](path, options), SCORERS[model_name], options)
+
+
+def score_chunk(chunk):
+    model, scorer, options = _worker
+    return scorer(model, chunk, options)
+
+
+def scored_chunks(chunks, model_name, path, options, workers):
+    if workers <= 1:
+        init_worker(model_name, path, options)
+        yield from map(score_chunk, chunks)
+        return
+
+    # Executor.map would read the whole file up front; keep a bounded window of chunks in flight instead
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(model_name, path, options)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(score_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a dataset file offline with the deal, device price or sentiment model")
+    parser.add_argument("model", choices=MODELS)
+    parser.add_argument("input", help=".parquet, .feather/.arrow or .csv")
+    parser.add_argument("output", help=".parquet, .feather/.arrow or .csv")
+    parser.add_argument("--model-dir", help="artifact directory (default: the registry version, or the working directory)")
+    parser.add_argument("--registry", default=os.environ.get("MODEL_REGISTRY_DIR"))
+    parser.add_argument("--version", help="registry version (default: current)")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=1, help="scoring processes")
+    parser.add_argument("--threads", type=int, help="model threads per process (default: CPUs / workers)")
+    parser.add_argument("--text-column", default="text", help="sentiment: column holding the texts")
+    parser.add_argument("--backend", default=os.environ.get("SENTIMENT_BACKEND", "keras"), help="sentiment: keras or tflite")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1 or args.workers < 1:
+        parser.error("--chunk-size and --workers must be positive")
+
+    path = args.model_dir or ModelRegistry(root=args.registry).resolve(args.model, args.version)[1]
+    options = SimpleNamespace(
+        threads=args.threads or max(1, (os.cpu_count() or 1) // args.workers),
+        text_column=args.text_column,
+        backend=args.backend,
+        average_prices=None,
+    )
+
+    started = time.perf_counter()
+    if args.model == "deal":
+        options.average_prices = deal_average_prices(args.input, load_product_index(path), args.chunk_size)
+
+    chunks = iter_dataset(args.input, chunk_size=args.chunk_size)
+    rows = write_dataset(scored_chunks(chunks, args.model, path, options, args.workers), args.output)
+    seconds = time.perf_counter() - started
+    print(f"Scored {rows:,} rows with {args.model} from {path} into {args.output} in {seconds:.1f}s "
+          f"({rows / seconds if seconds else 0:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Batch sentiment scoring shared by the API apps.
+
+Texts are tokenized in one ``TextVectorizer.transform`` call, grouped by token
+count into padding buckets and scored with one model call per bucket. Results
+come back in input order.
+
+Scores are keyed on the padded token ids rather than the raw text, since that
+is all the model sees: texts that differ only in case, punctuation or words
+past ``max_len`` are scored once per batch, and with a ``cache`` (an
+``LRUCache``) only sequences it doesn't hold go to the model.
+"""
+import os
+import pickle
+
+import numpy as np
+
+from text_vectorizer import TextVectorizer
+
+MAX_LEN = 50
+DEFAULT_BUCKETS = (8, 16, 32)
+VOCABULARY_FILE = "sentiment_vocab.json"
+KERAS_MODEL_FILE = "sentiment_lstm.h5"
+TFLITE_MODEL_FILE = "sentiment_lstm.tflite"
+SENTIMENT_BACKENDS = ("keras", "tflite")
+
+
+def load_sentiment_model(path, backend="keras", num_threads=None):
+    # "keras": the .h5 model through TensorFlow; "tflite": the quantized export through the TFLite interpreter
+    if backend == "tflite":
+        from tflite_model import TFLiteModel
+        return TFLiteModel.load(os.path.join(path, TFLITE_MODEL_FILE), num_threads=num_threads)
+    if backend != "keras":
+        raise ValueError(f"Unknown sentiment backend '{backend}', expected one of {', '.join(SENTIMENT_BACKENDS)}")
+
+    from compiled_model import CompiledModel  # imports TensorFlow
+    return CompiledModel.load(os.path.join(path, KERAS_MODEL_FILE), input_signature=input_signature())
+
+
+def load_vectorizer(path):
+    # Vocabulary exported by sentiment.py; versions trained before it only have the pickled Tokenizer
+    vocabulary = os.path.join(path, VOCABULARY_FILE)
+    if os.path.exists(vocabulary):
+        return TextVectorizer.load(vocabulary)
+    with open(os.path.join(path, "tokenizer.pkl"), "rb") as handle:
+        return TextVectorizer.from_tokenizer(pickle.load(handle))
+
+
+def input_signature():
+    # Padded token ids of any length, so every padding bucket shares one traced graph
+    import tensorflow as tf
+    return [tf.TensorSpec(shape=[None, None], dtype=tf.int32)]
+
+
+def padding_buckets(model, max_len=MAX_LEN, buckets=DEFAULT_BUCKETS):
+    # Padding to a shorter length only gives the same output when the embedding
+    # masks the padding value; otherwise the leading zeros feed the LSTM state.
+    layers = getattr(model, "layers", None) or [None]
+    if not getattr(layers[0], "mask_zero", False):
+        return [max_len]
+    return sorted({b for b in buckets if 0 < b < max_len} | {max_len})
+
+
+def sentiment_label(prediction):
+    sentiment = "Positive" if prediction > 0.5 else "Negative"
+    confidence = prediction if prediction > 0.5 else 1 - prediction
+    return sentiment, float(confidence)
+
+
+def predict_sentiment_batch(texts, model, vectorizer, max_len=MAX_LEN, buckets=None, batch_size=256, cache=None, generation=None):
+    padded, lengths = vectorizer.transform(texts, max_len)
+    if not len(padded):
+        return []
+
+    # Each distinct token sequence is looked up and scored once
+    sequences, first, inverse = np.unique(padded, axis=0, return_index=True, return_inverse=True)
+    predictions = np.empty(len(sequences), dtype=np.float32)
+    pending = np.ones(len(sequences), dtype=bool)
+
+    if cache is not None:
+        # Pass the generation read before the model was fetched, so a hot reload in between isn't cached
+        generation = cache.generation if generation is None else generation
+        keys = [sequence.tobytes() for sequence in sequences]
+        for i, key in enumerate(keys):
+            cached = cache.get(key)
+            if cached is not None:
+                predictions[i] = cached
+                pending[i] = False
+
+    buckets = buckets or [max_len]
+    bucket_ids = np.searchsorted(buckets, lengths[first])  # smallest bucket that fits each sequence
+
+    for bucket_id in np.unique(bucket_ids[pending]):
+        idx = np.flatnonzero(pending & (bucket_ids == bucket_id))
+        # Sequences are right aligned, so the last columns are the same ids pad_sequences(maxlen=bucket) gives
+        padded_sequences = sequences[idx, max_len - buckets[bucket_id]:]
+        predictions[idx] = model.predict(padded_sequences, batch_size=batch_size)[:, 0]
+
+    if cache is not None:
+        for i in np.flatnonzero(pending):
+            cache.put(keys[i], float(predictions[i]), generation=generation)
+
+    return [sentiment_label(prediction) for prediction in predictions[inverse.reshape(-1)]]
+
+
+def predict_sentiment(text, model, vectorizer, max_len=MAX_LEN):
+    return predict_sentiment_batch([text], model, vectorizer, max_len)[0]
@@ -0,0 +1,51 @@
+"""Export the deal and device price models for the slim serving app (slim_main.py).
+
+The slim app loads plain XGBoost booster JSON and JSON label lists, so it
+never unpickles sklearn/joblib objects. Run this next to existing artifacts
+(or a registry version directory):
+
+    python slim_export.py [artifact_dir ...]
+
+The training scripts call the same functions after saving their models.
+"""
+import json
+import os
+import sys
+
+DEAL_BOOSTER = "best_xgb_model.json"  # already saved by XGBClassifier.save_model
+DEAL_LABELS = "deal_labels.json"
+DEVICE_PRICE_BOOSTER = "device_price_booster.json"
+
+
+def export_deal(path="."):
+    import joblib
+
+    le_product = joblib.load(os.path.join(path, "product_encoder.pkl"))
+    le_deal = joblib.load(os.path.join(path, "deal_encoder.pkl"))
+
+    # LabelEncoder codes are the positions in classes_
+    labels = {
+        "products": [str(name) for name in le_product.classes_],
+        "deals": [str(name) for name in le_deal.classes_],
+    }
+    target = os.path.join(path, DEAL_LABELS)
+    with open(target, "w", encoding="utf-8") as handle:
+        json.dump(labels, handle, ensure_ascii=False)
+    return target
+
+
+def export_device_price(path="."):
+    import joblib
+
+    model = joblib.load(os.path.join(path, "device_price_prediction_model_xgb.pkl"))
+    target = os.path.join(path, DEVICE_PRICE_BOOSTER)
+    model.get_booster().save_model(target)  # keeps the training feature names
+    return target
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:] or ["."]:
+        if os.path.exists(os.path.join(path, "deal_encoder.pkl")):
+            print(f"Exported {export_deal(path)}")
+        if os.path.exists(os.path.join(path, "device_price_prediction_model_xgb.pkl")):
+            print(f"Exported {export_device_price(path)}")
@@ -0,0 +1,144 @@
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+import json
+import os
+import numpy as np
+import xgboost as xgb
+from types import SimpleNamespace
+from typing import List
+from deal_features import DEAL_FEATURES, adjust_deals, deal_features
+from device_features import DeviceFeatureEncoder
+from device_inputs import DeviceBatchRequest, DeviceInput, device_forecast, device_record, predict_devices
+from model_registry import ModelLoadError, ModelRegistry
+from product_index import ProductIndex
+from registry_routes import admin_router
+from slim_export import DEAL_BOOSTER, DEAL_LABELS, DEVICE_PRICE_BOOSTER
+
+# Slim serving app for /predict_deal and /predict_device_price: XGBoost boosters and NumPy only.
+# It doesn't need TensorFlow, the sentiment model, joblib/sklearn pickles or pandas. xgboost still
+# imports pandas and sklearn whenever they are installed, so the fast start and small workers only
+# hold in an environment without them (fastapi, uvicorn, numpy and xgboost; see the README).
+# Artifacts come from slim_export.py (the training scripts write them too).
+# Run with: uvicorn slim_main:app --workers N
+app = FastAPI()
+
+registry = ModelRegistry(root=os.environ.get("MODEL_REGISTRY_DIR"))
+PRELOAD_MODELS = os.environ.get("PRELOAD_MODELS", "deal,device_price").split(",")
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# One XGBoost thread per worker by default; scale out with more workers instead
+XGB_NTHREAD = int(os.environ.get("XGB_NTHREAD", "1"))
+
+@app.exception_handler(ModelLoadError)
+async def model_load_error_handler(request, exc):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+# /healthz, /readyz and /admin/models/{name}/reload (disabled unless ADMIN_TOKEN is set)
+app.include_router(admin_router(registry, admin_token=ADMIN_TOKEN))
+
+# Load a booster saved with save_model(), predicting with the same trees the sklearn wrapper would use
+def load_booster(file):
+    booster = xgb.Booster(params={"nthread": XGB_NTHREAD}, model_file=file)
+    best_iteration = booster.attr("best_iteration")
+    iteration_range = (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+    objective = json.loads(booster.save_config())["learner"]["objective"]["name"]
+    return SimpleNamespace(booster=booster, iteration_range=iteration_range, objective=objective)
+
+def predict_raw(model, X):
+    # inplace_predict skips building a DMatrix for every request
+    return model.booster.inplace_predict(X, iteration_range=model.iteration_range)
+
+def predict_classes(model, X):
+    # Same decoding as XGBClassifier.predict
+    prediction = predict_raw(model, X)
+    if prediction.ndim > 1 and prediction.shape[1] > 1:
+        return np.argmax(prediction, axis=1)
+    prediction = prediction.reshape(len(X))
+    if model.objective == "multi:softmax":
+        return prediction.astype(np.intp)
+    return (prediction > 0.5).astype(np.intp)
+
+# ====================== Product Deal Prediction Section ======================
+NORMALIZE_PRODUCT_NAMES = os.environ.get("NORMALIZE_PRODUCT_NAMES", "0") == "1"
+
+# Load the deal booster and the product / deal labels exported from the encoders
+def load_deal(path):
+    deal = load_booster(os.path.join(path, DEAL_BOOSTER))
+    predict_classes(deal, np.zeros((1, len(DEAL_FEATURES)), dtype=np.float32))  # Warm up
+
+    with open(os.path.join(path, DEAL_LABELS), encoding="utf-8") as handle:
+        labels = json.load(handle)
+
+    deal.product_index = ProductIndex(labels["products"], normalize=NORMALIZE_PRODUCT_NAMES)
+    deal.labels = np.array(labels["deals"], dtype=object)
+    return deal
+
+registry.register("deal", load_deal, eager="deal" in PRELOAD_MODELS)
+
+# Input Models
+class ProductInput(BaseModel):
+    product: str
+    price: float
+    distance: float
+
+class ProductList(BaseModel):
+    items: List[ProductInput]
+
+# Bulk deal prediction for a list of ProductInput, same features and rules as main.py
+def predict_deal_items(items):
+    deal = registry.get("deal")
+    records = [item.dict() for item in items]
+    prediction = np.full(len(items), "Unknown Product", dtype=object)
+
+    # Handle unknown products
+    codes, _ = deal.product_index.lookup([item.product for item in items])
+    known = codes >= 0
+
+    if known.any():
+        price = np.array([item.price for item in items], dtype=float)[known]
+        distance = np.array([item.distance for item in items], dtype=float)[known]
+
+        # One float32 feature matrix for the whole request; avg_price is per product over the known products in the request
+        input_data, price_deviation = deal_features(codes[known], price, distance)
+
+        # Make prediction
+        predicted_deal = adjust_deals(deal.labels[predict_classes(deal, input_data)], price_deviation)
+
+        prediction[known] = predicted_deal
+
+    return {"predictions": [dict(record, prediction=label) for record, label in zip(records, prediction)]}
+
+# Prediction endpoint
+@app.post("/predict_deal")
+def predict_bulk(data: ProductList):
+    return predict_deal_items(data.items)
+
+# ====================== Device Price Prediction Section ======================
+# Load the device price booster; the one-hot layout comes from the feature names saved with it
+def load_device_price(path):
+    device_price = load_booster(os.path.join(path, DEVICE_PRICE_BOOSTER))
+    device_price.encoder = DeviceFeatureEncoder.from_model(device_price.booster)
+    predict_raw(device_price, np.zeros((1, len(device_price.encoder.columns)), dtype=np.float32))  # Warm up
+    return device_price
+
+registry.register("device_price", load_device_price, eager="device_price" in PRELOAD_MODELS)
+
+@app.post("/predict_device_price")
+def predict_price(device: DeviceInput):
+    device_price = registry.get("device_price")
+    try:
+        input_matrix = device_price.encoder.encode([device_record(device)])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return device_forecast(predict_raw(device_price, input_matrix).reshape(-1))
+
+# Devices are validated one by one so a bad row gets its own error, as in main.py
+@app.post("/predict_device_price_batch")
+def predict_price_batch(request: DeviceBatchRequest):
+    device_price = registry.get("device_price")
+    return {"predictions": predict_devices(request.devices, device_price.encoder, lambda X: predict_raw(device_price, X))}
+
+# Start loading models in the background, and pick up newly published versions if MODEL_WATCH_INTERVAL is set
+registry.load_all()
+registry.watch(float(os.environ.get("MODEL_WATCH_INTERVAL", "0")))
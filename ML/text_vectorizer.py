@@ -0,0 +1,92 @@
+"""Keras ``Tokenizer`` lookups without Keras.
+
+``export_vocabulary()`` writes the part of a fitted ``Tokenizer`` that
+``texts_to_sequences`` actually uses: its text filters and the words whose
+index is below ``num_words``, in index order. That is a small JSON file instead
+of a pickle holding the counts of every word ever seen.
+
+``TextVectorizer`` loads it and turns a batch of texts into the same token ids
+as ``texts_to_sequences`` followed by ``pad_sequences`` (pre-padding and
+pre-truncation), as one int32 NumPy matrix. The text filters run through a
+translation table built once, and padding is done with array indexing.
+"""
+import json
+
+import numpy as np
+
+VOCABULARY_FORMAT = 1
+
+
+def export_vocabulary(tokenizer, path):
+    if tokenizer.char_level:
+        raise ValueError("Character level tokenizers are not supported")
+
+    num_words = tokenizer.num_words
+    words = sorted(tokenizer.word_index, key=tokenizer.word_index.get)
+    if num_words:
+        words = words[:num_words - 1]  # ids 1 .. num_words - 1; higher ids become the OOV token
+
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump({
+            "format": VOCABULARY_FORMAT,
+            "filters": tokenizer.filters,
+            "lower": tokenizer.lower,
+            "split": tokenizer.split,
+            "oov_token": tokenizer.oov_token,
+            "words": words,
+        }, handle, ensure_ascii=False)
+
+
+class TextVectorizer:
+    def __init__(self, words, filters, lower=True, split=" ", oov_token=None):
+        # Word at position i has token id i + 1, as in Tokenizer.word_index
+        self.index = {word: i for i, word in enumerate(words, start=1)}
+        self.oov_index = self.index.get(oov_token) if oov_token is not None else None
+        self.lower = lower
+        self.split = split
+        self.table = str.maketrans({c: split for c in filters})
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as handle:
+            vocabulary = json.load(handle)
+        if vocabulary.get("format") != VOCABULARY_FORMAT:
+            raise ValueError(f"Unsupported vocabulary format in {path}")
+        return cls(vocabulary["words"], vocabulary["filters"], vocabulary["lower"], vocabulary["split"], vocabulary["oov_token"])
+
+    @classmethod
+    def from_tokenizer(cls, tokenizer):
+        # Same lookups as export_vocabulary() + load(), for an already unpickled Tokenizer
+        words = sorted(tokenizer.word_index, key=tokenizer.word_index.get)
+        if tokenizer.num_words:
+            words = words[:tokenizer.num_words - 1]
+        return cls(words, tokenizer.filters, tokenizer.lower, tokenizer.split, tokenizer.oov_token)
+
+    def __len__(self):
+        return len(self.index) + 1  # ids 0 (padding) .. len(index)
+
+    def tokens(self, text):
+        # text_to_word_sequence(), then the vocabulary lookup of texts_to_sequences()
+        if self.lower:
+            text = text.lower()
+        words = text.translate(self.table).split(self.split)
+        index = self.index
+        if self.oov_index is None:
+            return [index[word] for word in words if word in index]
+        oov_index = self.oov_index
+        return [index.get(word, oov_index) for word in words if word]
+
+    def transform(self, texts, max_len):
+        """(n, max_len) int32 token ids padded like pad_sequences(maxlen=max_len), and the unpadded lengths (at most max_len)."""
+        sequences = [self.tokens(text) for text in texts]
+        lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+        ids = np.fromiter((i for sequence in sequences for i in sequence), dtype=np.int32, count=int(lengths.sum()))
+
+        padded = np.zeros((len(sequences), max_len), dtype=np.int32)
+        if ids.size:
+            # Position of each token counted from the end of its text: the last max_len tokens are kept, right aligned
+            from_end = np.repeat(np.cumsum(lengths), lengths) - np.arange(ids.size) - 1
+            keep = from_end < max_len
+            rows = np.repeat(np.arange(len(sequences)), lengths)
+            padded[rows[keep], max_len - 1 - from_end[keep]] = ids[keep]
+        return padded, np.minimum(lengths, max_len)
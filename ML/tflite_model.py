@@ -0,0 +1,99 @@
+"""Keras models exported to TensorFlow Lite and served by the TFLite interpreter.
+
+``export_tflite()`` converts a Keras model with dynamic range quantization
+(int8 weights, float activations) or, given representative inputs, int8
+quantization of the activations as well.
+
+``TFLiteModel`` runs the exported file behind the same ``predict()`` call as the
+Keras model. It uses the ``tflite_runtime`` package when it is installed, so a
+serving worker never imports TensorFlow, and ``tf.lite`` otherwise. An
+interpreter can only run one call at a time, so concurrent calls each take an
+idle interpreter from a pool that grows on demand.
+"""
+import queue
+
+import numpy as np
+
+QUANTIZATIONS = ("none", "dynamic", "int8")
+
+
+def export_tflite(model, path, quantization="dynamic", representative_data=None):
+    import tensorflow as tf
+
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization '{quantization}', expected one of {', '.join(QUANTIZATIONS)}")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization != "none":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "int8":
+        if representative_data is None:
+            raise ValueError("int8 quantization needs representative_data to calibrate the activations")
+        dtype = tf.as_dtype(model.inputs[0].dtype).as_numpy_dtype
+        converter.representative_dataset = lambda: ([np.asarray(row[np.newaxis], dtype=dtype)] for row in representative_data)
+
+    with open(path, "wb") as handle:
+        handle.write(converter.convert())
+
+
+def interpreter_class():
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteModel:
+    def __init__(self, model_content, num_threads=None):
+        self.model_content = model_content
+        self.num_threads = num_threads
+        self._interpreter_class = interpreter_class()
+        self._idle = queue.SimpleQueue()
+
+        interpreter = self._new_interpreter()
+        detail = interpreter.get_input_details()[0]
+        self.input_dtype = detail["dtype"]
+        self.input_shape = tuple(detail["shape_signature"])
+        self._idle.put(interpreter)
+
+    @classmethod
+    def load(cls, path, num_threads=None, warmup=True):
+        with open(path, "rb") as handle:
+            compiled = cls(handle.read(), num_threads)
+        if warmup:
+            compiled.warmup()
+        return compiled
+
+    def _new_interpreter(self):
+        interpreter = self._interpreter_class(model_content=self.model_content, num_threads=self.num_threads)
+        interpreter.allocate_tensors()
+        return interpreter
+
+    def _invoke(self, interpreter, x):
+        detail = interpreter.get_input_details()[0]
+        if tuple(detail["shape"]) != x.shape:
+            # Tensors are only reallocated when the batch shape changes
+            interpreter.resize_tensor_input(detail["index"], x.shape)
+            interpreter.allocate_tensors()
+        interpreter.set_tensor(detail["index"], x)
+        interpreter.invoke()
+        return interpreter.get_tensor(interpreter.get_output_details()[0]["index"])
+
+    def predict(self, x, batch_size=None, verbose=None):
+        x = np.asarray(x, dtype=self.input_dtype)
+        try:
+            interpreter = self._idle.get_nowait()
+        except queue.Empty:
+            interpreter = self._new_interpreter()
+
+        try:
+            if not batch_size or len(x) <= batch_size:
+                return self._invoke(interpreter, x)
+            return np.concatenate([self._invoke(interpreter, x[start:start + batch_size]) for start in range(0, len(x), batch_size)])
+        finally:
+            self._idle.put(interpreter)
+
+    def warmup(self):
+        self.predict(np.zeros((1,) + tuple(max(1, d) for d in self.input_shape[1:])))
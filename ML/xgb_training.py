@@ -0,0 +1,101 @@
+"""XGBoost training helpers shared by best_deal.py and model.py.
+
+- ``select_device()`` picks ``cuda`` when a usable GPU is present and ``cpu``
+  otherwise (override with ``XGB_DEVICE``). Both use ``tree_method='hist'``.
+- ``available_threads()`` is the explicit thread count for CPU training
+  (``TRAIN_THREADS``, default: the CPUs this process may run on).
+- ``ChunkIter`` feeds (X, y) chunks to ``xgb.QuantileDMatrix`` or, with a
+  cache prefix, to external memory, so the raw dataset is never fully loaded.
+- ``track_run()`` reports wall-clock time and peak memory for a training run.
+"""
+import json
+import os
+import sys
+import time
+import warnings
+from contextlib import contextmanager
+
+import numpy as np
+import xgboost as xgb
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def available_threads():
+    threads = os.environ.get("TRAIN_THREADS")
+    if threads:
+        return int(threads)
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def select_device(requested=None):
+    """Return "cuda" or "cpu" for ``requested`` ("auto", "cpu", "cuda"; default: XGB_DEVICE or "auto")."""
+    requested = requested or os.environ.get("XGB_DEVICE", "auto")
+    if requested != "auto":
+        return requested
+    if not xgb.build_info().get("USE_CUDA"):
+        return "cpu"
+
+    # A CUDA build falls back to the CPU (with a warning) when there is no usable GPU; ask it what it used
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        probe = xgb.train(
+            {"device": "cuda", "tree_method": "hist", "verbosity": 0},
+            xgb.DMatrix(np.zeros((2, 1)), label=[0, 1]),
+            num_boost_round=1,
+        )
+    return json.loads(probe.save_config())["learner"]["generic_param"]["device"]
+
+
+class ChunkIter(xgb.DataIter):
+    """Data iterator over ``make_chunks()``, which must yield (X, y) and can be called again for each pass."""
+
+    def __init__(self, make_chunks, cache_prefix=None):
+        self.make_chunks = make_chunks
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = iter(self.make_chunks())
+        for X, y in self._chunks:
+            if len(X):
+                input_data(data=X, label=y)
+                return True
+        return False
+
+    def reset(self):
+        self._chunks = None
+
+
+def training_matrix(make_chunks, external_memory=False, cache_dir=".", max_bin=256):
+    """Quantized training data built chunk by chunk; external memory keeps the pages on disk."""
+    if not external_memory:
+        return xgb.QuantileDMatrix(ChunkIter(make_chunks), max_bin=max_bin)
+
+    cache_prefix = os.path.join(cache_dir, "xgb_cache")
+    if hasattr(xgb, "ExtMemQuantileDMatrix"):  # xgboost >= 3.0
+        return xgb.ExtMemQuantileDMatrix(ChunkIter(make_chunks, cache_prefix), max_bin=max_bin)
+    return xgb.DMatrix(ChunkIter(make_chunks, cache_prefix))
+
+
+def peak_memory_mb():
+    if resource is None:
+        return None
+    usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024  # bytes on macOS, KiB on Linux
+
+
+@contextmanager
+def track_run(label, **details):
+    started = time.perf_counter()
+    yield
+    peak = peak_memory_mb()
+    info = ", ".join(f"{key}={value}" for key, value in details.items())
+    print(f"⏱️ {label}: {time.perf_counter() - started:.1f}s, peak memory {f'{peak:.0f} MB' if peak is not None else 'n/a'}"
+          + (f" ({info})" if info else ""))